@@ -1,17 +1,21 @@
 import os
+import hmac
+import logging
 import secrets
 import hashlib
 import random
+import zlib
+import pandas as pd
+from functools import lru_cache
 from typing import Optional
 from fastapi import HTTPException, Depends, Header, Cookie, Request
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Store sessions in memory (use Redis for production)
-active_sessions = {}
+log = logging.getLogger(__name__)
 
 # Generate secure tokens for you and your wife
 # You can generate these tokens and share them securely
@@ -36,8 +40,30 @@ if os.getenv("AUTH_TOKEN_1"):
 if os.getenv("AUTH_TOKEN_2"):
     TRUSTED_TOKENS.add(os.getenv("AUTH_TOKEN_2"))
 
+# Freeze the token set and encode it once; all comparisons work on bytes
+TRUSTED_TOKENS = frozenset(TRUSTED_TOKENS)
+TRUSTED_TOKENS_B = frozenset(t.encode('utf-8') for t in TRUSTED_TOKENS)
+TRUSTED_TOKEN_COUNT = len(TRUSTED_TOKENS_B)
+
 # If no tokens configured, use demo mode
-DEMO_MODE = len(TRUSTED_TOKENS) == 0
+DEMO_MODE = TRUSTED_TOKEN_COUNT == 0
+if DEMO_MODE:
+    log.warning("⚠️  Warning: No AUTH_TOKEN configured. Running in demo mode with normalized data.")
+
+# Digests computed once; comparing fixed 32-byte digests hides token length too
+_TRUSTED_DIGESTS = tuple(hashlib.sha256(t).digest() for t in TRUSTED_TOKENS_B)
+
+def is_trusted_token(token: str) -> bool:
+    """
+    Check a token against the trusted list in constant time.
+    The token is hashed with SHA-256 and its digest compared against every
+    trusted digest, so timing reveals neither a matching prefix nor the length.
+    """
+    d = hashlib.sha256(token.encode('utf-8')).digest()
+    ok = 0
+    for td in _TRUSTED_DIGESTS:
+        ok |= int(hmac.compare_digest(d, td))
+    return bool(ok) and not DEMO_MODE
 
 def verify_token(
     request: Request,
@@ -54,31 +80,34 @@ def verify_token(
     # Priority 1: Check httpOnly cookie (most secure)
     if session_token:
         token = session_token
-        print(f"[AUTH] Token from cookie: {token[:10]}...")
+        log.debug("[AUTH] Token from cookie: %s...", token[:10])
     # Priority 2: Check Authorization header (backwards compatible)
     elif authorization:
         token = authorization.replace("Bearer ", "").strip()
-        print(f"[AUTH] Token from header: {token[:10]}...")
+        log.debug("[AUTH] Token from header: %s...", token[:10])
 
     if DEMO_MODE:
         # If no tokens configured, allow access but with normalized data
-        print("⚠️  Warning: No AUTH_TOKEN configured. Running in demo mode with normalized data.")
         return False
 
     if not token:
-        print("[AUTH] No token provided (neither cookie nor header)")
+        log.debug("[AUTH] No token provided (neither cookie nor header)")
         return False
 
-    print(f"[AUTH] Checking against {len(TRUSTED_TOKENS)} trusted tokens")
+    log.debug("[AUTH] Checking against %d trusted tokens", TRUSTED_TOKEN_COUNT)
 
     # Check if token is in trusted list
-    if token in TRUSTED_TOKENS:
-        print("[AUTH] ✓ Token is TRUSTED")
+    if is_trusted_token(token):
+        log.debug("[AUTH] ✓ Token is TRUSTED")
         return True
 
-    print("[AUTH] ✗ Token is NOT TRUSTED")
+    log.debug("[AUTH] ✗ Token is NOT TRUSTED")
     return False
 
+# Today's obfuscation factor, recomputed only when the date changes
+_FACTOR_CACHE_DATE = None
+_FACTOR_CACHE_VALUE = None
+
 def get_daily_obfuscation_factor() -> float:
     """
     Generate a random obfuscation factor that changes daily.
@@ -86,18 +115,30 @@ def get_daily_obfuscation_factor() -> float:
 
     Returns a factor between 0.2 and 0.4 that stays consistent for the current day.
     """
-    import random
-    from datetime import date
+    global _FACTOR_CACHE_DATE, _FACTOR_CACHE_VALUE
 
     # Use current date as seed so factor is consistent throughout the day
     today = date.today()
+    if _FACTOR_CACHE_DATE == today:
+        return _FACTOR_CACHE_VALUE
+
     seed = int(today.strftime('%Y%m%d'))
 
     # Create random generator with today's seed
     rng = random.Random(seed)
 
     # Generate factor between 0.2 and 0.4
-    return rng.uniform(0.2, 0.4)
+    _FACTOR_CACHE_VALUE = rng.uniform(0.2, 0.4)
+    _FACTOR_CACHE_DATE = today
+    return _FACTOR_CACHE_VALUE
+
+def normalize_amount_float(amount, normalization_factor: float):
+    """normalize_amount specialized for numeric input and an explicit factor"""
+    return None if amount is None else round(float(amount) * normalization_factor, 2)
+
+def normalize_amount_str(amount: str, normalization_factor: float):
+    """normalize_amount specialized for string input (may contain commas)"""
+    return None if not amount else round(float(amount.replace(',', '')) * normalization_factor, 2)
 
 def normalize_amount(amount, normalization_factor: float = None):
     """
@@ -105,19 +146,25 @@ def normalize_amount(amount, normalization_factor: float = None):
 
     The factor changes every day and is random between 0.2-0.4, making it
     impossible to reverse-engineer actual amounts even with access to code.
+    Batch callers that know their input type should call normalize_amount_float
+    or normalize_amount_str directly.
     """
-    if amount is None or amount == '':
-        return None
-
-    # Convert string to float if needed (handle commas)
-    if isinstance(amount, str):
-        amount = float(amount.replace(',', ''))
-
     # Use daily random factor if none provided
     if normalization_factor is None:
         normalization_factor = get_daily_obfuscation_factor()
 
-    return round(float(amount) * normalization_factor, 2)
+    if isinstance(amount, str):
+        return normalize_amount_str(amount, normalization_factor)
+    return normalize_amount_float(amount, normalization_factor)
+
+def normalize_amount_series(s: pd.Series, factor: float) -> pd.Series:
+    """
+    Vectorized normalize_amount for a whole column.
+    Strings with thousands separators are parsed; missing values stay NaN.
+    """
+    if not pd.api.types.is_numeric_dtype(s):
+        s = pd.to_numeric(s.astype(str).str.replace(',', '', regex=False), errors='coerce')
+    return (s * factor).round(2)
 
 def get_normalization_factor(df=None, target_yearly_expense: float = None) -> float:
     """
@@ -148,20 +195,21 @@ INCOME_TAGS = [
     "other"
 ]
 
+@lru_cache(maxsize=4096)
 def anonymize_income_text(text: str, seed: int = 42) -> str:
     """
     Anonymize income source text while keeping it consistent.
-    Uses seeded random to ensure same input always produces same output.
+    Uses a CRC32 hash to ensure same input always produces same output.
     """
     if not text or text == '':
         return ''
 
-    # Create a hash of the text to use as seed
-    text_hash = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
-    rng = random.Random(text_hash + seed)
+    # CRC32 of the text picks the entry directly - no RNG needed
+    text_hash = zlib.crc32(text.encode()) & 0xFFFFFFFF
+    pool = INCOME_CATEGORIES if len(text) > 20 else INCOME_TAGS
 
     # Return a consistent anonymized category/tag
-    return rng.choice(INCOME_CATEGORIES if len(text) > 20 else INCOME_TAGS)
+    return pool[(text_hash + seed) % len(pool)]
 
 def anonymize_income_entry(entry: dict, normalization_factor: float = 1.0) -> dict:
     """
@@ -171,26 +219,65 @@ def anonymize_income_entry(entry: dict, normalization_factor: float = 1.0) -> di
     - Replace tags with generic tags
     - Replace description with generic text
     """
-    anonymized = entry.copy()
+    # Resolve the daily factor once for both amount fields
+    if normalization_factor is None:
+        normalization_factor = get_daily_obfuscation_factor()
 
-    # Normalize amounts
-    if anonymized.get('Income amount'):
-        anonymized['Income amount'] = normalize_amount(anonymized['Income amount'], normalization_factor)
-    if anonymized.get('In main currency'):
-        anonymized['In main currency'] = normalize_amount(anonymized['In main currency'], normalization_factor)
+    income_amount = entry.get('Income amount')
+    main_amount = entry.get('In main currency')
+    category = entry.get('Category')
+    tags = entry.get('Tags')
+    description = entry.get('Description')
+
+    # Build the result in one go; untouched fields come straight from entry
+    # and fields the entry does not have are not added
+    anonymized = {
+        'Income amount': normalize_amount(income_amount, normalization_factor) if income_amount else income_amount,
+        'In main currency': normalize_amount(main_amount, normalization_factor) if main_amount else main_amount,
+        'Category': anonymize_income_text(category) if category else category,
+        'Tags': anonymize_income_tags(tags) if tags else tags,
+        'Description': 'Income payment' if description else description,
+    }
+    return {**entry, **{key: value for key, value in anonymized.items() if key in entry}}
+
+def anonymize_income_tags(tags: str) -> str:
+    """Anonymize each tag of a comma-separated tag string"""
+    # Split tags and anonymize each; dict.fromkeys dedupes and keeps first-seen order
+    anonymized_tags = dict.fromkeys(anonymize_income_text(tag.strip()) for tag in tags.split(','))
+    return ', '.join(anonymized_tags)
+
+def anonymize_income_df(df: pd.DataFrame, normalization_factor: float = None) -> pd.DataFrame:
+    """
+    Anonymize a DataFrame of income entries for guest viewing, column by column.
+    Same rules as anonymize_income_entry, but text fields are anonymized once
+    per unique value and mapped back onto the column.
+    """
+    if normalization_factor is None:
+        normalization_factor = get_daily_obfuscation_factor()
+
+    return anonymize_income_labels(df.assign(**{
+        col: normalize_amount_series(df[col], normalization_factor)
+        for col in ('Income amount', 'In main currency') if col in df.columns
+    }))
+
+def anonymize_income_labels(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The text part of anonymize_income_df: category, tags and description,
+    for callers that already hold normalized amounts
+    """
+    anonymized = df.copy()
 
-    # Anonymize text fields
-    if anonymized.get('Category'):
-        anonymized['Category'] = anonymize_income_text(anonymized['Category'])
+    if 'Category' in df.columns:
+        categories = df['Category'].dropna().unique()
+        anonymized['Category'] = df['Category'].map({c: anonymize_income_text(c) for c in categories})
 
-    if anonymized.get('Tags'):
-        # Split tags and anonymize each
-        tags = anonymized['Tags'].split(',')
-        anonymized_tags = [anonymize_income_text(tag.strip()) for tag in tags]
-        anonymized['Tags'] = ', '.join(set(anonymized_tags))  # Remove duplicates
+    if 'Tags' in df.columns:
+        tags = df['Tags'].dropna().unique()
+        anonymized['Tags'] = df['Tags'].map({t: anonymize_income_tags(t) if t else t for t in tags})
 
-    if anonymized.get('Description'):
-        anonymized['Description'] = 'Income payment'
+    if 'Description' in df.columns:
+        has_description = df['Description'].notna() & (df['Description'] != '')
+        anonymized['Description'] = df['Description'].where(~has_description, 'Income payment')
 
     return anonymized
 
@@ -1,10 +1,11 @@
 """
 Database configuration and models for Finance Analysis
 """
-from sqlalchemy import create_engine, Column, Integer, Float, String, DateTime, Text
+from sqlalchemy import create_engine, make_url, Column, Integer, BigInteger, Float, String, DateTime, Text, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import time
 
 # Get database URL from environment (Railway provides DATABASE_URL)
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -14,6 +15,17 @@ engine = None
 SessionLocal = None
 Base = declarative_base()
 _db_initialized = False
+_tables_ensured = False
+
+# Rows per multi-row INSERT statement for bulk inserts without COPY
+INSERT_PAGE_SIZE = 3000
+
+# Full-text search document for a transaction (PostgreSQL only); queries must
+# use this exact expression for the GIN index to apply
+SEARCH_DOCUMENT_SQL = (
+    "to_tsvector('simple', coalesce(category, '') || ' ' || "
+    "coalesce(tags, '') || ' ' || coalesce(description, ''))"
+)
 
 
 class Transaction(Base):
@@ -32,20 +44,185 @@ class Transaction(Base):
     in_main_currency = Column(Float, default=0.0)  # Amount converted to main currency
     description = Column(Text)
 
+    # Partial indexes matching the expense/income filters, ordered by date
+    __table_args__ = (
+        Index(
+            "ix_transactions_expense_date", date.desc(),
+            postgresql_where=expense_amount > 0,
+            sqlite_where=expense_amount > 0,
+        ),
+        Index(
+            "ix_transactions_income_date", date.desc(),
+            postgresql_where=income_amount > 0,
+            sqlite_where=income_amount > 0,
+        ),
+        Index(
+            "ix_transactions_search", text(SEARCH_DOCUMENT_SQL),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    def to_tuple(self):
+        """Convert to a tuple ordered like COLUMNS"""
+        return (
+            self.date,
+            self.account,
+            self.category,
+            self.tags,
+            self.expense_amount,
+            self.income_amount,
+            self.currency,
+            self.main_currency,
+            self.in_main_currency,
+            self.description,
+        )
+
     def to_dict(self):
         """Convert to dictionary matching the CSV format"""
-        return {
-            "Date": self.date,
-            "Account": self.account,
-            "Category": self.category,
-            "Tags": self.tags,
-            "Expense amount": self.expense_amount,
-            "Income amount": self.income_amount,
-            "Currency": self.currency,
-            "Main currency": self.main_currency,
-            "In main currency": self.in_main_currency,
-            "Description": self.description,
-        }
+        return dict(zip(COLUMNS, self.to_tuple()))
+
+
+class MonthlyRollup(Base):
+    """
+    Per (year, month, category) totals of transactions, in main currency.
+    Kept up to date by triggers on transactions (PostgreSQL only).
+    """
+    __tablename__ = "monthly_rollup"
+
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    category = Column(String(255), primary_key=True)  # '' for uncategorized
+    expenses = Column(Float, nullable=False, default=0.0)
+    income = Column(Float, nullable=False, default=0.0)
+    expense_count = Column(Integer, nullable=False, default=0)
+    income_count = Column(Integer, nullable=False, default=0)
+
+
+class DataVersion(Base):
+    """
+    Single-row counter of changes to the stored transactions. Imports bump it
+    in their own transaction, so every worker (and the migration script)
+    agrees on when cached data is stale.
+    """
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False)
+
+
+# CSV column names, in the order returned by Transaction.to_tuple()
+COLUMNS = (
+    "Date",
+    "Account",
+    "Category",
+    "Tags",
+    "Expense amount",
+    "Income amount",
+    "Currency",
+    "Main currency",
+    "In main currency",
+    "Description",
+)
+
+# Table column names, in the same order as COLUMNS
+TABLE_COLUMNS = (
+    "date",
+    "account",
+    "category",
+    "tags",
+    "expense_amount",
+    "income_amount",
+    "currency",
+    "main_currency",
+    "in_main_currency",
+    "description",
+)
+
+
+# Contribution of each transaction row to its monthly_rollup bucket
+_ROLLUP_ROW_SQL = """
+    SELECT extract(year FROM date)::int AS year,
+           extract(month FROM date)::int AS month,
+           coalesce(category, '') AS category,
+           CASE WHEN expense_amount > 0 THEN coalesce(in_main_currency, 0) ELSE 0 END AS expenses,
+           CASE WHEN income_amount > 0 THEN coalesce(in_main_currency, 0) ELSE 0 END AS income,
+           CASE WHEN expense_amount > 0 THEN 1 ELSE 0 END AS expense_count,
+           CASE WHEN income_amount > 0 THEN 1 ELSE 0 END AS income_count
+    FROM {source}
+"""
+
+# Fold a set of (possibly negated) contributions into monthly_rollup
+_ROLLUP_UPSERT_SQL = """
+    INSERT INTO monthly_rollup AS r (year, month, category, expenses, income, expense_count, income_count)
+    SELECT year, month, category, sum(expenses), sum(income), sum(expense_count), sum(income_count)
+    FROM ({rows}) AS delta
+    GROUP BY year, month, category
+    ON CONFLICT (year, month, category) DO UPDATE SET
+        expenses = r.expenses + excluded.expenses,
+        income = r.income + excluded.income,
+        expense_count = r.expense_count + excluded.expense_count,
+        income_count = r.income_count + excluded.income_count
+"""
+
+_NEGATED_ROWS_SQL = (
+    "SELECT year, month, category, -expenses AS expenses, -income AS income, "
+    "-expense_count AS expense_count, -income_count AS income_count "
+    "FROM (" + _ROLLUP_ROW_SQL.format(source="old_rows") + ") AS old"
+)
+
+# Statement-level triggers: one aggregated upsert per INSERT/UPDATE/DELETE,
+# reading the affected rows from transition tables
+ROLLUP_TRIGGER_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION monthly_rollup_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            """ + _ROLLUP_UPSERT_SQL.format(rows=_ROLLUP_ROW_SQL.format(source="new_rows")) + """;
+        ELSIF TG_OP = 'DELETE' THEN
+            """ + _ROLLUP_UPSERT_SQL.format(rows=_NEGATED_ROWS_SQL) + """;
+        ELSIF TG_OP = 'UPDATE' THEN
+            """ + _ROLLUP_UPSERT_SQL.format(
+                rows=_ROLLUP_ROW_SQL.format(source="new_rows") + " UNION ALL " + _NEGATED_ROWS_SQL
+            ) + """;
+        ELSE
+            DELETE FROM monthly_rollup;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM monthly_rollup WHERE expense_count = 0 AND income_count = 0;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS monthly_rollup_insert ON transactions",
+    "DROP TRIGGER IF EXISTS monthly_rollup_update ON transactions",
+    "DROP TRIGGER IF EXISTS monthly_rollup_delete ON transactions",
+    "DROP TRIGGER IF EXISTS monthly_rollup_truncate ON transactions",
+    """
+    CREATE TRIGGER monthly_rollup_insert AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION monthly_rollup_apply()
+    """,
+    """
+    CREATE TRIGGER monthly_rollup_update AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION monthly_rollup_apply()
+    """,
+    """
+    CREATE TRIGGER monthly_rollup_delete AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION monthly_rollup_apply()
+    """,
+    """
+    CREATE TRIGGER monthly_rollup_truncate AFTER TRUNCATE ON transactions
+    FOR EACH STATEMENT EXECUTE FUNCTION monthly_rollup_apply()
+    """,
+]
+
+# One-off fill for data loaded before the triggers existed
+ROLLUP_BACKFILL_SQL = _ROLLUP_UPSERT_SQL.format(
+    rows=_ROLLUP_ROW_SQL.format(source="transactions") + " WHERE NOT EXISTS (SELECT 1 FROM monthly_rollup)"
+)
 
 
 def init_db():
@@ -63,7 +240,25 @@ def init_db():
         return engine
 
     # Create engine (lazy connection - doesn't actually connect until first query)
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+    # Outside development, skip the per-checkout SELECT 1 and rely on pool_recycle
+    # plus the disconnect retry in db_operations instead.
+    # executemany INSERTs go out as multi-row VALUES pages of INSERT_PAGE_SIZE rows
+    # (SQLAlchemy lowers it where a driver caps bind parameters)
+    engine_options = {}
+    if make_url(DATABASE_URL).get_driver_name() == "psycopg2":
+        # Also batch executemany UPDATE/DELETE through psycopg2's execute_batch
+        engine_options["executemany_mode"] = "values_plus_batch"
+        engine_options["executemany_batch_page_size"] = 500
+
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=10,
+        max_overflow=20,
+        pool_recycle=280,
+        pool_pre_ping=os.getenv("ENVIRONMENT", "development") == "development",
+        insertmanyvalues_page_size=INSERT_PAGE_SIZE,
+        **engine_options,
+    )
 
     # Create session factory
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -74,10 +269,42 @@ def init_db():
 
 def ensure_tables_exist():
     """Create tables if they don't exist (called on first database access)"""
-    global engine
-    if engine is not None:
+    global engine, _tables_ensured
+    if engine is not None and not _tables_ensured:
         Base.metadata.create_all(bind=engine)
 
+        # create_all skips existing tables, so add any indexes they are missing
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+
+        create_rollup_triggers(engine)
+        seed_data_version(engine)
+        _tables_ensured = True
+
+
+def create_rollup_triggers(bind):
+    """Install the monthly_rollup triggers and fill the rollup if it is empty (PostgreSQL only)"""
+    if bind.dialect.name != "postgresql":
+        return
+
+    with bind.begin() as conn:
+        for statement in ROLLUP_TRIGGER_SQL:
+            conn.execute(text(statement))
+        conn.execute(text(ROLLUP_BACKFILL_SQL))
+
+
+def seed_data_version(bind):
+    """
+    Create the data_version row if it is missing. It starts from the current
+    time in microseconds, so versions keep increasing across a table reset.
+    """
+    with bind.begin() as conn:
+        conn.execute(
+            text("INSERT INTO data_version (id, version) SELECT 1, :seed WHERE NOT EXISTS (SELECT 1 FROM data_version)"),
+            {"seed": time.time_ns() // 1000},
+        )
+
 
 def get_db():
     """Dependency for FastAPI endpoints"""
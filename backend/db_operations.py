@@ -1,42 +1,63 @@
 """
 Database operations for querying financial data
 """
+import re
 import pandas as pd
+from functools import wraps
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import func, extract, select, case, text, update, false
+from sqlalchemy.exc import DBAPIError, DisconnectionError
 from datetime import datetime
 from typing import Optional, Dict, List
 
 try:
-    from backend.database import Transaction
+    from backend.database import Transaction, MonthlyRollup, DataVersion, COLUMNS, TABLE_COLUMNS, SEARCH_DOCUMENT_SQL
 except ImportError:
-    from database import Transaction
+    from database import Transaction, MonthlyRollup, DataVersion, COLUMNS, TABLE_COLUMNS, SEARCH_DOCUMENT_SQL
 
+# Model columns in the order of COLUMNS (and Transaction.to_tuple)
+TRANSACTION_COLUMNS = tuple(getattr(Transaction, name) for name in TABLE_COLUMNS)
 
+# Rows fetched per round trip when streaming large result sets
+DATAFRAME_CHUNK_SIZE = 10000
+
+# Letters and digits of a search query; each run becomes one prefix term
+SEARCH_WORD = re.compile(r'[^\W_]+')
+
+def _retry_on_disconnect(func):
+    """
+    Run a query helper again, once, if its pooled connection was dead.
+    Stands in for pool_pre_ping: stale connections are only paid for when hit.
+    """
+    @wraps(func)
+    def wrapper(db: Session, *args, **kwargs):
+        try:
+            return func(db, *args, **kwargs)
+        except (DBAPIError, DisconnectionError) as e:
+            if isinstance(e, DBAPIError) and not e.connection_invalidated:
+                raise
+            db.rollback()
+            return func(db, *args, **kwargs)
+    return wrapper
+
+
+@_retry_on_disconnect
 def get_all_transactions_as_dataframe(db: Session) -> pd.DataFrame:
     """
     Fetch all transactions from database and convert to pandas DataFrame
-    matching the original CSV format
+    matching the original CSV format.
+    Rows are read straight from the cursor, without building ORM objects.
     """
-    transactions = db.query(Transaction).all()
-
-    if not transactions:
-        # Return empty DataFrame with expected columns
-        return pd.DataFrame(columns=[
-            "Date", "Account", "Category", "Tags", "Expense amount",
-            "Income amount", "Currency", "Main currency", "Description"
-        ])
+    stmt = select(*(column.label(name) for column, name in zip(TRANSACTION_COLUMNS, COLUMNS)))
 
-    # Convert to list of dictionaries
-    data = [t.to_dict() for t in transactions]
+    # Server-side cursor: rows arrive in batches instead of one buffered result
+    stmt = stmt.execution_options(stream_results=True)
+    chunks = list(pd.read_sql_query(stmt, db.connection(), parse_dates=["Date"], chunksize=DATAFRAME_CHUNK_SIZE))
 
-    # Create DataFrame
-    df = pd.DataFrame(data)
-
-    # Ensure date column is datetime
-    df['Date'] = pd.to_datetime(df['Date'])
-
-    return df
+    if len(chunks) == 1:
+        # An empty table still yields one empty chunk with the expected columns
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
 
 
 def get_transactions_by_date_range(
@@ -55,6 +76,7 @@ def get_transactions_by_date_range(
     return query.order_by(Transaction.date.desc()).all()
 
 
+@_retry_on_disconnect
 def get_expenses(db: Session, category: Optional[str] = None) -> List[Transaction]:
     """Get all expense transactions, optionally filtered by category"""
     query = db.query(Transaction).filter(Transaction.expense_amount > 0)
@@ -65,6 +87,7 @@ def get_expenses(db: Session, category: Optional[str] = None) -> List[Transactio
     return query.order_by(Transaction.date.desc()).all()
 
 
+@_retry_on_disconnect
 def get_income(db: Session, category: Optional[str] = None) -> List[Transaction]:
     """Get all income transactions, optionally filtered by category"""
     query = db.query(Transaction).filter(Transaction.income_amount > 0)
@@ -75,6 +98,7 @@ def get_income(db: Session, category: Optional[str] = None) -> List[Transaction]
     return query.order_by(Transaction.date.desc()).all()
 
 
+@_retry_on_disconnect
 def get_categories(db: Session) -> List[str]:
     """Get all unique categories"""
     categories = db.query(Transaction.category).distinct().filter(
@@ -83,8 +107,19 @@ def get_categories(db: Session) -> List[str]:
     return sorted([c[0] for c in categories if c[0]])
 
 
+@_retry_on_disconnect
 def get_all_tags(db: Session) -> List[str]:
     """Get all unique tags"""
+    # PostgreSQL splits, trims and dedupes in the database
+    if db.get_bind().dialect.name == "postgresql":
+        rows = db.execute(text(
+            "SELECT DISTINCT trim(t) AS tag "
+            "FROM transactions, unnest(string_to_array(tags, ',')) AS t "
+            "WHERE trim(t) <> '' ORDER BY 1"
+        )).all()
+        return [r.tag for r in rows]
+
+    # Other databases (e.g. SQLite) fall back to splitting in Python
     transactions = db.query(Transaction.tags).filter(
         Transaction.tags.isnot(None)
     ).all()
@@ -100,39 +135,127 @@ def get_all_tags(db: Session) -> List[str]:
     return sorted(list(all_tags))
 
 
+def _prefix_tsquery(query_text: str) -> str:
+    """tsquery matching every word of the query as a prefix, e.g. 'cof sh' -> 'cof:* & sh:*'"""
+    return ' & '.join(f"{word}:*" for word in SEARCH_WORD.findall(query_text.lower()))
+
+
+def _search_condition(db: Session, query_text: str):
+    """
+    Filter matching transactions for a search query.
+    PostgreSQL uses full-text search backed by the GIN index on the search
+    document, matching each query word as a word prefix ('cof' finds
+    'coffee'); other databases fall back to a substring match.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        tsquery = _prefix_tsquery(query_text)
+        if not tsquery:
+            # Only punctuation: nothing to search for
+            return false()
+        return text(f"{SEARCH_DOCUMENT_SQL} @@ to_tsquery('simple', :tsquery)").bindparams(tsquery=tsquery)
+
+    return (
+        (Transaction.description.ilike(f"%{query_text}%")) |
+        (Transaction.tags.ilike(f"%{query_text}%")) |
+        (Transaction.category.ilike(f"%{query_text}%"))
+    )
+
+
+@_retry_on_disconnect
 def search_transactions(
     db: Session,
     query_text: str,
-    category: Optional[str] = None
+    category: Optional[str] = None,
+    limit: Optional[int] = None
 ) -> List[Transaction]:
-    """Search transactions by description or tags"""
-    search_query = db.query(Transaction).filter(
-        (Transaction.description.ilike(f"%{query_text}%")) |
-        (Transaction.tags.ilike(f"%{query_text}%"))
-    )
+    """Search transactions by category, description or tags"""
+    search_query = db.query(Transaction).filter(_search_condition(db, query_text))
 
     if category:
         search_query = search_query.filter(Transaction.category == category)
 
-    return search_query.order_by(Transaction.date.desc()).all()
+    search_query = search_query.order_by(Transaction.date.desc())
+    if limit is not None:
+        search_query = search_query.limit(limit)
+
+    return search_query.all()
 
 
+@_retry_on_disconnect
+def get_search_totals(db: Session, query_text: str) -> Dict:
+    """Count and amount totals (in main currency) over all search matches"""
+    count, total_expenses, total_income = db.query(
+        func.count(Transaction.id),
+        func.coalesce(func.sum(case((Transaction.expense_amount > 0, Transaction.in_main_currency), else_=0)), 0),
+        func.coalesce(func.sum(case((Transaction.income_amount > 0, Transaction.in_main_currency), else_=0)), 0),
+    ).filter(_search_condition(db, query_text)).one()
+
+    return {
+        "count": int(count),
+        "total_expenses": float(total_expenses),
+        "total_income": float(total_income),
+    }
+
+
+@_retry_on_disconnect
 def get_transaction_count(db: Session) -> int:
     """Get total number of transactions"""
     return db.query(Transaction).count()
 
 
+@_retry_on_disconnect
+def has_transactions(db: Session) -> bool:
+    """Whether any transaction exists (stops at the first row instead of counting)"""
+    return db.query(Transaction.id).limit(1).first() is not None
+
+
+@_retry_on_disconnect
+def get_data_version(db: Session) -> int:
+    """Current version of the stored transactions (0 until the version row exists)"""
+    return db.query(DataVersion.version).filter(DataVersion.id == 1).scalar() or 0
+
+
+def bump_data_version(db: Session) -> None:
+    """Mark the stored transactions as changed; takes effect when the caller commits"""
+    db.execute(update(DataVersion).where(DataVersion.id == 1).values(version=DataVersion.version + 1))
+
+
+@_retry_on_disconnect
 def get_summary_stats(db: Session) -> Dict:
-    """Get summary statistics"""
-    total_expenses = db.query(func.sum(Transaction.expense_amount)).scalar() or 0
-    total_income = db.query(func.sum(Transaction.income_amount)).scalar() or 0
-    expense_count = db.query(Transaction).filter(Transaction.expense_amount > 0).count()
-    income_count = db.query(Transaction).filter(Transaction.income_amount > 0).count()
+    """Get summary statistics in a single aggregate query"""
+    total_expenses, total_income, expense_count, income_count = db.query(
+        func.coalesce(func.sum(Transaction.expense_amount), 0),
+        func.coalesce(func.sum(Transaction.income_amount), 0),
+        func.coalesce(func.sum(case((Transaction.expense_amount > 0, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Transaction.income_amount > 0, 1), else_=0)), 0),
+    ).one()
 
     return {
         "total_expenses": float(total_expenses),
         "total_income": float(total_income),
         "net": float(total_income - total_expenses),
-        "expense_count": expense_count,
-        "income_count": income_count,
+        "expense_count": int(expense_count),
+        "income_count": int(income_count),
     }
+
+
+@_retry_on_disconnect
+def get_monthly_rollup(db: Session) -> Optional[pd.DataFrame]:
+    """
+    Fetch the trigger-maintained monthly_rollup table, one row per
+    (year, month, category). Returns None where the rollup is not
+    maintained (non-PostgreSQL databases).
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+
+    stmt = select(
+        MonthlyRollup.year,
+        MonthlyRollup.month,
+        MonthlyRollup.category,
+        MonthlyRollup.expenses,
+        MonthlyRollup.income,
+        MonthlyRollup.expense_count,
+        MonthlyRollup.income_count,
+    )
+    return pd.read_sql_query(stmt, db.connection())
@@ -0,0 +1,251 @@
+"""
+Shared CSV ingest for the migrate endpoint and migrate_csv_to_db.py:
+parsing, cleaning and bulk insertion of transactions live here exactly once
+"""
+import io
+import queue
+import threading
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+from typing import Callable, Optional
+
+try:
+    from backend.database import Transaction, COLUMNS, TABLE_COLUMNS
+    from backend.db_operations import bump_data_version
+except ImportError:
+    from database import Transaction, COLUMNS, TABLE_COLUMNS
+    from db_operations import bump_data_version
+
+# Rows parsed, cleaned and inserted at a time
+CHUNK_ROWS = 50_000
+
+# Parsed chunks allowed to wait for insertion; bounds memory while parsing runs ahead
+PARSE_QUEUE_CHUNKS = 4
+
+# Queued by the parser thread after the last chunk
+_END_OF_INPUT = object()
+
+# Text columns of a transaction; empty values are stored as '' rather than NULL
+TEXT_COLUMNS = ("Account", "Category", "Tags", "Currency", "Main currency", "Description")
+
+# Columns whose empty fields are parsed as missing, and what they are filled with.
+# All other text columns keep empty fields as '' straight from the parser.
+MISSING_DEFAULTS = {
+    'Expense amount': 0.0,
+    'Income amount': 0.0,
+    'In main currency': 0.0,
+    'Currency': 'EUR',
+    'Main currency': 'EUR',
+}
+
+# read_csv options that parse dates, amounts (thousands separators included)
+# and text columns inside the C parser instead of in extra passes afterwards
+CSV_OPTIONS = {
+    'parse_dates': ['Date'],
+    'date_format': '%m/%d/%y',
+    'thousands': ',',
+    'keep_default_na': False,
+    'na_values': {name: [''] for name in ('Date', *MISSING_DEFAULTS)},
+    'dtype': {
+        'Account': 'string',
+        'Category': 'string',
+        'Tags': 'string',
+        'Currency': 'string',
+        'Main currency': 'string',
+        'Description': 'string',
+        'Expense amount': 'float64',
+        'Income amount': 'float64',
+        'In main currency': 'float64',
+    },
+}
+
+# Binary COPY layout: the fixed-width columns first, so that part of every
+# row can be packed for the whole chunk at once with a NumPy record array
+BINARY_FIXED_COLUMNS = ("date", "expense_amount", "income_amount", "in_main_currency")
+BINARY_TEXT_COLUMNS = tuple(TABLE_COLUMNS[COLUMNS.index(name)] for name in TEXT_COLUMNS)
+
+# Text columns with a handful of distinct values; each value is encoded once per chunk
+LOW_CARDINALITY_COLUMNS = frozenset(("account", "category", "currency", "main_currency"))
+
+# Bulk load for psycopg2: rows streamed through a single binary COPY
+COPY_TRANSACTIONS_SQL = (
+    f"COPY {Transaction.__tablename__} ({', '.join(BINARY_FIXED_COLUMNS + BINARY_TEXT_COLUMNS)}) "
+    f"FROM STDIN WITH (FORMAT binary)"
+)
+
+# Binary COPY framing: signature, flags and header extension length; -1 field count ends the data
+BINARY_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + (0).to_bytes(4, "big") + (0).to_bytes(4, "big")
+BINARY_COPY_TRAILER = (-1).to_bytes(2, "big", signed=True)
+
+# Per-row field count, then each fixed-width field as (length, big-endian value)
+BINARY_FIXED_ROW = np.dtype(
+    [("field_count", ">i2"), ("date_length", ">i4"), ("date", ">i8")] +
+    [field for name in BINARY_FIXED_COLUMNS[1:] for field in ((f"{name}_length", ">i4"), (name, ">f8"))]
+)
+
+# PostgreSQL timestamps are microseconds since 2000-01-01
+PG_EPOCH = np.datetime64("2000-01-01T00:00:00", "us")
+
+
+def clean_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Finish one parsed CSV chunk: bad dates and missing values"""
+    # A chunk holding an unparseable date comes back as text; coerce it to NaT
+    if not pd.api.types.is_datetime64_any_dtype(chunk['Date']):
+        chunk['Date'] = pd.to_datetime(chunk['Date'], format='%m/%d/%y', errors='coerce')
+
+    chunk.fillna(MISSING_DEFAULTS, inplace=True)
+    return chunk
+
+
+def _transaction_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Shape a cleaned CSV DataFrame like the transactions table (column order and names)"""
+    records = frame.reindex(columns=list(COLUMNS)).fillna({'In main currency': 0.0, 'Description': ''})
+    records = records.astype({name: str for name in TEXT_COLUMNS})
+    records.columns = TABLE_COLUMNS
+    return records
+
+
+def _frame_text(value: str) -> bytes:
+    """One text field of a binary COPY row: length, then the UTF-8 bytes"""
+    encoded = value.encode("utf-8")
+    return len(encoded).to_bytes(4, "big") + encoded
+
+
+def _binary_copy_payload(records: pd.DataFrame) -> bytes:
+    """
+    Encode table-shaped rows in PostgreSQL's binary COPY format.
+    Dates and amounts are written from their NumPy arrays as-is (no float to
+    text round trip); only the text fields are framed per value.
+    """
+    dates = records["date"].to_numpy(dtype="datetime64[us]")
+    if np.isnat(dates).any():
+        raise ValueError("Transactions without a valid date cannot be imported")
+
+    fixed = np.empty(len(records), dtype=BINARY_FIXED_ROW)
+    fixed["field_count"] = len(BINARY_FIXED_COLUMNS) + len(BINARY_TEXT_COLUMNS)
+    fixed["date_length"] = 8
+    fixed["date"] = (dates - PG_EPOCH).astype("i8")
+    for name in BINARY_FIXED_COLUMNS[1:]:
+        fixed[f"{name}_length"] = 8
+        fixed[name] = records[name].to_numpy(dtype="f8")
+
+    fixed_bytes = fixed.tobytes()
+    size = BINARY_FIXED_ROW.itemsize
+    fixed_rows = [fixed_bytes[i:i + size] for i in range(0, len(fixed_bytes), size)]
+
+    text_fields = []
+    for name in BINARY_TEXT_COLUMNS:
+        if name in LOW_CARDINALITY_COLUMNS:
+            # Frame each distinct value once, then pick the framings by code
+            codes, values = pd.factorize(records[name])
+            framed = np.array([_frame_text(value) for value in values] or [b""], dtype=object)
+            text_fields.append(framed[codes].tolist())
+        else:
+            text_fields.append([_frame_text(value) for value in records[name]])
+
+    rows = (b"".join(row) for row in zip(fixed_rows, *text_fields))
+    return BINARY_COPY_HEADER + b"".join(rows) + BINARY_COPY_TRAILER
+
+
+def begin_bulk_load(db: Session) -> None:
+    """
+    Relax durability for the current transaction only (PostgreSQL): its commit
+    returns without waiting for the WAL flush. A crash can lose the import
+    but never corrupts the table.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SET LOCAL synchronous_commit = off"))
+
+
+def insert_transactions(db: Session, frame: pd.DataFrame) -> int:
+    """
+    Bulk insert cleaned transactions (CSV column names) without building ORM objects.
+    With psycopg2 the rows are streamed through a binary COPY; other drivers
+    use multi-row INSERTs. Does not commit. Returns the number of rows inserted.
+    """
+    records = _transaction_frame(frame)
+    connection = db.connection()
+
+    if connection.dialect.driver == "psycopg2":
+        buffer = io.BytesIO(_binary_copy_payload(records))
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(COPY_TRANSACTIONS_SQL, buffer)
+    else:
+        # Plain tuples straight from the columns, no per-row Series or ORM objects.
+        # A Core insert with a parameter list goes through insertmanyvalues: one
+        # multi-row INSERT ... VALUES per INSERT_PAGE_SIZE rows, the same
+        # statement psycopg2.extras.execute_values would build
+        rows = records.itertuples(index=False, name=None)
+        connection.execute(insert(Transaction), [dict(zip(TABLE_COLUMNS, row)) for row in rows])
+
+    return len(records)
+
+
+def _parse_chunks(source, chunks: queue.Queue, stop: threading.Event) -> None:
+    """
+    Parser thread: read and clean the CSV chunk by chunk onto the queue,
+    then the end marker, or the exception that stopped parsing.
+    """
+    try:
+        for chunk in pd.read_csv(source, chunksize=CHUNK_ROWS, **CSV_OPTIONS):
+            if stop.is_set():
+                return
+            chunks.put(clean_chunk(chunk))
+    except Exception as e:
+        chunks.put(e)
+        return
+    chunks.put(_END_OF_INPUT)
+
+
+def ingest_transactions(
+    source,
+    db: Session,
+    on_progress: Optional[Callable[[int], None]] = None
+) -> int:
+    """
+    Import a transactions CSV (path or binary file object) into the database.
+    The file is parsed and cleaned chunk by chunk on a background thread
+    while the calling thread inserts the previous chunks, so parsing overlaps
+    the database round trips; the bounded queue keeps memory flat whatever
+    the file size. Runs in the caller's transaction and does not commit; the
+    data version is bumped in the same transaction, so caches go stale on commit.
+    Returns the number of rows inserted.
+
+    Args:
+        source: CSV file path or file object
+        db: Database session
+        on_progress: Called with the running row count after each chunk
+            (always on the calling thread)
+    """
+    begin_bulk_load(db)
+    bump_data_version(db)
+
+    chunks = queue.Queue(maxsize=PARSE_QUEUE_CHUNKS)
+    stop = threading.Event()
+    parser = threading.Thread(target=_parse_chunks, args=(source, chunks, stop), name="csv-parse", daemon=True)
+    parser.start()
+
+    inserted = 0
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is _END_OF_INPUT:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            inserted += insert_transactions(db, chunk)
+            if on_progress is not None:
+                on_progress(inserted)
+    finally:
+        # On an insert error, unblock the parser (queue full) and let it see stop
+        stop.set()
+        while True:
+            try:
+                chunks.get_nowait()
+            except queue.Empty:
+                break
+        parser.join()
+
+    return inserted
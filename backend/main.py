@@ -1,20 +1,25 @@
 from fastapi import FastAPI, HTTPException, Depends, Header, Response, Request, UploadFile, File
-import tempfile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 import pandas as pd
+import numpy as np
 import os
-from datetime import datetime
+import asyncio
+import re
+import threading
+import importlib.util
+from datetime import datetime, date
 from collections import defaultdict
+from functools import lru_cache
 import anthropic
 from dotenv import load_dotenv
 try:
-    from backend.auth import verify_token, normalize_amount, get_normalization_factor, anonymize_income_entry, TRUSTED_TOKENS, anonymize_income_text
+    from backend.auth import verify_token, normalize_amount, normalize_amount_float, normalize_amount_series, get_normalization_factor, anonymize_income_labels, is_trusted_token, anonymize_income_text
 except ImportError:
-    from auth import verify_token, normalize_amount, get_normalization_factor, anonymize_income_entry, TRUSTED_TOKENS, anonymize_income_text
+    from auth import verify_token, normalize_amount, normalize_amount_float, normalize_amount_series, get_normalization_factor, anonymize_income_labels, is_trusted_token, anonymize_income_text
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -24,11 +29,11 @@ load_dotenv()
 
 # Initialize database (PostgreSQL on Railway, CSV fallback for local)
 try:
-    from backend.database import init_db, get_db
-    from backend.db_operations import get_all_transactions_as_dataframe
+    from backend.database import init_db, get_db, COLUMNS
+    from backend.db_operations import get_all_transactions_as_dataframe, search_transactions, get_search_totals, get_monthly_rollup, get_data_version
 except ImportError:
-    from database import init_db, get_db
-    from db_operations import get_all_transactions_as_dataframe
+    from database import init_db, get_db, COLUMNS
+    from db_operations import get_all_transactions_as_dataframe, search_transactions, get_search_totals, get_monthly_rollup, get_data_version
 
 # Initialize database connection
 print("[STARTUP] Initializing database...")
@@ -47,9 +52,23 @@ else:
     print("[DB] No DATABASE_URL found - using CSV fallback mode")
 
 # Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Moving window: no burst of 2x the limit across a window boundary.
+# With REDIS_URL (and the redis extra) counters are shared by all workers;
+# if Redis is unreachable, limits fall back to per-process memory.
+REDIS_URL = os.getenv("REDIS_URL")
+RATE_LIMIT_STORAGE = REDIS_URL if importlib.util.find_spec("redis") else None
+if REDIS_URL and RATE_LIMIT_STORAGE is None:
+    print("[RATE LIMIT] Warning: REDIS_URL is set but the redis package is not installed "
+          "(install the backend with its [redis] extra); limits are per process")
+limiter = Limiter(
+    key_func=get_remote_address,
+    strategy="moving-window",
+    storage_uri=RATE_LIMIT_STORAGE or "memory://",
+    in_memory_fallback_enabled=bool(RATE_LIMIT_STORAGE),
+)
 
-app = FastAPI(title="Finance Analysis API")
+# orjson serializes the float-heavy summary/expense payloads much faster than stdlib json
+app = FastAPI(title="Finance Analysis API", default_response_class=ORJSONResponse)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -69,11 +88,40 @@ app.add_middleware(
 # Load CSV data (optional at startup - will be loaded when endpoints are accessed)
 DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data")
 df = None
+rollup = None  # monthly_rollup rows loaded alongside df (PostgreSQL only)
 NORMALIZATION_FACTOR = None
 
+# Amount columns, and the internal columns holding their normalized (guest) values
+AMOUNT_COLUMNS = ['Expense amount', 'Income amount', 'In main currency']
+NORMALIZED_COLUMNS = {col: f'_{col}_norm' for col in AMOUNT_COLUMNS}
+
+# Amounts shown (normalized) to guests in income entries
+INCOME_AMOUNT_COLUMNS = ['Income amount', 'In main currency']
+
+# Data version behind df; cached data and summaries are keyed on it
+_loaded_version = None
+_load_lock = threading.Lock()
+_normalized_with = None  # factor behind df's precomputed normalized columns
+
+def current_data_version(db=None) -> int:
+    """
+    Version of the stored transactions. In database mode it is read from the
+    data_version table, which every import bumps, so all workers see changes
+    made by any of them or by the migration script; a CSV load never changes.
+    """
+    if USE_DATABASE and db is not None:
+        return get_data_version(db)
+    return 0
+
+def refresh_normalization_factor():
+    """Pick up today's obfuscation factor (cached per date, so this is cheap)"""
+    global NORMALIZATION_FACTOR
+    NORMALIZATION_FACTOR = get_normalization_factor()
+
 def load_data(db=None):
     """
-    Load financial data - from PostgreSQL if available, otherwise CSV fallback
+    Load financial data - from PostgreSQL if available, otherwise CSV fallback.
+    The cleaned DataFrame is cached until the data version changes.
 
     Args:
         db: Database session (optional, for PostgreSQL mode)
@@ -81,14 +129,59 @@ def load_data(db=None):
     Returns:
         pandas DataFrame with financial data
     """
-    global df, NORMALIZATION_FACTOR
+    refresh_normalization_factor()
+    version = current_data_version(db)
+
+    if df is not None and _loaded_version == version and _normalized_with == NORMALIZATION_FACTOR:
+        return df
+
+    # Single flight: concurrent requests on a cold cache wait for one load
+    # instead of each pulling the whole table on its own threadpool worker
+    with _load_lock:
+        if df is None or _loaded_version != version:
+            _reload_data(db, version)
+        if _normalized_with != NORMALIZATION_FACTOR:
+            _refresh_normalized_columns()
+        return df
+
+def _parse_amounts(column: pd.Series) -> pd.Series:
+    """Amount column as float, stripping thousands separators with a literal (non-regex) replace"""
+    if pd.api.types.is_numeric_dtype(column):
+        return column.astype(float)
+    return column.str.replace(',', '', regex=False).astype(float)
+
+def _refresh_normalized_columns():
+    """
+    Precompute guest (normalized) copies of the amount columns for the current
+    factor, so guest responses read them instead of scaling every request
+    (call with _load_lock held)
+    """
+    global df, _normalized_with
+    factor = NORMALIZATION_FACTOR
+    df = _with_normalized_columns(df, factor)
+    _normalized_with = factor
+
+def _with_normalized_columns(frame: pd.DataFrame, factor: float) -> pd.DataFrame:
+    """frame plus the normalized copies of its amount columns"""
+    return frame.assign(**{
+        NORMALIZED_COLUMNS[col]: normalize_amount_series(frame[col], factor)
+        for col in AMOUNT_COLUMNS
+    })
+
+def _reload_data(db=None, version: int = 0):
+    """Read and clean the data at `version`, replacing the cache (call with _load_lock held)"""
+    global df, rollup, _loaded_version, _normalized_with
+
+    _normalized_with = None
 
     # If using PostgreSQL and db session provided
     if USE_DATABASE and db is not None:
-        df = get_all_transactions_as_dataframe(db)
-        if df.empty:
+        data = get_all_transactions_as_dataframe(db)
+        if data.empty:
             raise HTTPException(status_code=503, detail="No financial data in database. Please run migration script.")
-        NORMALIZATION_FACTOR = get_normalization_factor(df)
+        rollup = get_monthly_rollup(db)
+        df = _prepare_data(data)
+        _loaded_version = version
         return df
 
     # CSV fallback mode (for local development or if no DB)
@@ -100,20 +193,121 @@ def load_data(db=None):
         raise HTTPException(status_code=503, detail="No financial data available. Please upload CSV files or configure DATABASE_URL.")
 
     CSV_FILE = os.path.join(DATA_PATH, csv_files[0])
-    df = pd.read_csv(CSV_FILE)
+    data = pd.read_csv(CSV_FILE)
 
     # Data cleaning
-    df['Date'] = pd.to_datetime(df['Date'], format='%m/%d/%y', errors='coerce')
-    df['Expense amount'] = df['Expense amount'].replace(',', '', regex=True).astype(float)
-    df['Income amount'] = df['Income amount'].replace(',', '', regex=True).astype(float)
-    df['In main currency'] = df['In main currency'].replace(',', '', regex=True).astype(float)
-    df = df.sort_values('Date', ascending=False)
-
-    # Calculate normalization factor once at startup
-    NORMALIZATION_FACTOR = get_normalization_factor(df)
+    data['Date'] = pd.to_datetime(data['Date'], format='%m/%d/%y', errors='coerce')
+    for col in AMOUNT_COLUMNS:
+        data[col] = _parse_amounts(data[col])
+    df = _prepare_data(data)
+    _loaded_version = version
 
     return df
 
+# Characters that make a filter string a regex rather than a plain substring
+REGEX_CHARS = re.compile(r'[.^$*+?{}\[\]\\|()]')
+
+def _contains(column: pd.Series, pattern: str, lowered: Optional[pd.Series] = None) -> pd.Series:
+    """
+    Case-insensitive str.contains, skipping the regex engine for plain text.
+    Plain text is matched against `lowered` (the column precomputed in
+    lowercase) when given, so cells are not case-folded per request.
+    """
+    if REGEX_CHARS.search(pattern):
+        return column.str.contains(pattern, case=False, na=False, regex=True)
+    if lowered is not None:
+        return lowered.str.contains(pattern.lower(), regex=False)
+    return column.str.contains(pattern, case=False, na=False, regex=False)
+
+# Low-cardinality text columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = ('Category', 'Currency', 'Main currency', 'Account')
+
+def _prepare_data(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shape freshly loaded data for the endpoints, once per load:
+    - sort by Date descending (NaT last), which _date_range_slice relies on
+    - precompute internal helper columns (prefixed with '_'); _search_blob
+      holds lowercased Category, Tags and Description joined by a unit
+      separator, so keyword search is a single substring scan;
+      _category_lower and _tags_lower back the category and tag filters
+    - store low-cardinality columns as categoricals so groupbys hash int codes
+    """
+    data = data.sort_values('Date', ascending=False, kind='stable', ignore_index=True)
+    data['_search_blob'] = (
+        data['Category'].fillna('').astype(str) + '\x1f' +
+        data['Tags'].fillna('').astype(str) + '\x1f' +
+        data['Description'].fillna('').astype(str)
+    ).str.lower()
+    # Categoricals, so str.contains runs once per distinct value, not per row
+    data['_category_lower'] = data['Category'].fillna('').astype(str).str.lower().astype('category')
+    data['_tags_lower'] = data['Tags'].fillna('').astype(str).str.lower().astype('category')
+    for col in CATEGORICAL_COLUMNS:
+        if col in data.columns:
+            data[col] = data[col].astype('category')
+    return data
+
+def _date_range_slice(frame: pd.DataFrame, start_date: Optional[str], end_date: Optional[str]) -> pd.DataFrame:
+    """
+    Rows of a Date-descending frame between start_date and end_date (inclusive),
+    located by binary search instead of full-column comparisons.
+    Rows without a date are excluded whenever a bound is given.
+    """
+    if not start_date and not end_date:
+        return frame
+
+    dates = frame['Date'].to_numpy()
+    unit = np.datetime_data(dates.dtype)[0]
+    # Reversed int64 view is ascending, with NaT (the smallest int64) first
+    ascending = dates.view('i8')[::-1]
+    n = len(ascending)
+
+    def bound(value: str) -> int:
+        return np.datetime64(pd.to_datetime(value), unit).astype('i8')
+
+    lo = np.searchsorted(ascending, bound(start_date) if start_date else np.iinfo('i8').min + 1, side='left')
+    hi = np.searchsorted(ascending, bound(end_date), side='right') if end_date else n
+    return frame.iloc[n - hi:n - lo]
+
+def _public_columns(frame: pd.DataFrame) -> pd.DataFrame:
+    """Drop the internal '_' helper columns before returning rows to clients"""
+    return frame.loc[:, ~frame.columns.str.startswith('_')]
+
+def _to_records(frame: pd.DataFrame) -> list:
+    """
+    Convert rows to JSON-ready dicts in one vectorized pass:
+    Date as an ISO string, NaN/NaT as None, internal columns dropped.
+    """
+    frame = _public_columns(frame)
+    frame = frame.assign(Date=frame['Date'].dt.strftime('%Y-%m-%dT%H:%M:%S')).astype(object)
+    return frame.where(frame.notna(), None).to_dict('records')
+
+def _tag_matrix(tags: pd.Series) -> tuple:
+    """
+    Sparse 0/1 tag indicator matrix in coordinate form: (rows, cols, names),
+    where rows holds row positions in `tags`, cols the matching tag codes
+    and names the distinct tags (sorted), each (row, tag) pair once.
+    Memory grows with the number of tag occurrences, not rows x distinct tags.
+    """
+    exploded = tags.fillna('').astype(str).reset_index(drop=True).str.split(',').explode().str.strip()
+    exploded = exploded[exploded != '']
+    codes, names = pd.factorize(exploded, sort=True)
+    pairs = np.unique(exploded.index.to_numpy(dtype='i8') * len(names) + codes)
+    return pairs // max(len(names), 1), pairs % max(len(names), 1), names
+
+@lru_cache(maxsize=2)
+def _tag_names(version: int) -> list:
+    """Sorted distinct tags of the loaded data, memoized per data version"""
+    return _tag_matrix(df['Tags'])[2].tolist()
+
+@lru_cache(maxsize=8)
+def _compute_summary(version: int, is_trusted: bool, normalization_factor: float) -> dict:
+    """
+    Summary of the currently loaded data, memoized per data version.
+    version and normalization_factor are only cache keys; call load_data first.
+    The returned dict is shared between requests and must not be mutated.
+    """
+    return _calculate_summary(df, is_trusted, rollup)
+
 class ExpenseFilter(BaseModel):
     category: Optional[str] = None
     tag: Optional[str] = None
@@ -127,73 +321,49 @@ class AIInsightRequest(BaseModel):
     query: Optional[str] = None
     time_period: Optional[str] = "all"
 
+def _normalize_values(values: dict) -> dict:
+    """Normalize every amount of a {key: amount} dict with one NumPy multiply"""
+    amounts = np.fromiter(values.values(), dtype=float, count=len(values))
+    return dict(zip(values.keys(), np.round(amounts * NORMALIZATION_FACTOR, 2).tolist()))
+
+PERIOD_FIELDS = ('expenses', 'income', 'net')
+
+def _normalize_periods(periods: dict) -> dict:
+    """Normalize a {period: {'expenses', 'income', 'net'}} dict with one NumPy multiply"""
+    amounts = np.array([[v[f] for f in PERIOD_FIELDS] for v in periods.values()], dtype=float).reshape(-1, len(PERIOD_FIELDS))
+    rows = np.round(amounts * NORMALIZATION_FACTOR, 2).tolist()
+    return {k: dict(zip(PERIOD_FIELDS, row)) for k, row in zip(periods.keys(), rows)}
+
 def apply_data_normalization(data: dict, is_trusted: bool) -> dict:
     """Apply normalization to financial data if user is not trusted"""
     if is_trusted:
         return data
 
-    # Normalize all monetary values
-    if 'total_expenses' in data:
-        data['total_expenses'] = normalize_amount(data['total_expenses'], NORMALIZATION_FACTOR)
-    if 'total_income' in data:
-        data['total_income'] = normalize_amount(data['total_income'], NORMALIZATION_FACTOR)
-    if 'net' in data:
-        data['net'] = normalize_amount(data['net'], NORMALIZATION_FACTOR)
-
-    if 'category_breakdown' in data:
-        data['category_breakdown'] = {
-            k: normalize_amount(v, NORMALIZATION_FACTOR)
-            for k, v in data['category_breakdown'].items()
-        }
-
-    if 'monthly_summary' in data:
-        data['monthly_summary'] = {
-            k: {
-                'expenses': normalize_amount(v['expenses'], NORMALIZATION_FACTOR),
-                'income': normalize_amount(v['income'], NORMALIZATION_FACTOR),
-                'net': normalize_amount(v['net'], NORMALIZATION_FACTOR)
-            }
-            for k, v in data['monthly_summary'].items()
-        }
-
-    if 'yearly_summary' in data:
-        data['yearly_summary'] = {
-            k: {
-                'expenses': normalize_amount(v['expenses'], NORMALIZATION_FACTOR),
-                'income': normalize_amount(v['income'], NORMALIZATION_FACTOR),
-                'net': normalize_amount(v['net'], NORMALIZATION_FACTOR)
-            }
-            for k, v in data['yearly_summary'].items()
-        }
+    # Normalize all monetary values (all pandas aggregates, so the float path applies)
+    for key in ('total_expenses', 'total_income', 'net'):
+        if key in data:
+            data[key] = normalize_amount_float(data[key], NORMALIZATION_FACTOR)
 
-    if 'top_tags' in data:
-        data['top_tags'] = {
-            k: normalize_amount(v, NORMALIZATION_FACTOR)
-            for k, v in data['top_tags'].items()
-        }
+    # Breakdowns are scaled as whole arrays rather than value by value
+    for key in ('category_breakdown', 'top_tags', 'income_breakdown'):
+        if key in data:
+            data[key] = _normalize_values(data[key])
 
-    if 'income_breakdown' in data:
-        data['income_breakdown'] = {
-            k: normalize_amount(v, NORMALIZATION_FACTOR)
-            for k, v in data['income_breakdown'].items()
-        }
+    for key in ('monthly_summary', 'yearly_summary'):
+        if key in data:
+            data[key] = _normalize_periods(data[key])
 
     return data
 
-def normalize_expenses_list(expenses: list, is_trusted: bool) -> list:
-    """Normalize expense amounts in a list"""
+def normalize_expenses_frame(frame: pd.DataFrame, is_trusted: bool, columns=AMOUNT_COLUMNS) -> pd.DataFrame:
+    """
+    Swap in the normalized amounts for guests, read from the precomputed
+    normalized columns (present on slices of the cached df)
+    """
     if is_trusted:
-        return expenses
-
-    for expense in expenses:
-        if 'Expense amount' in expense:
-            expense['Expense amount'] = normalize_amount(expense['Expense amount'], NORMALIZATION_FACTOR)
-        if 'Income amount' in expense:
-            expense['Income amount'] = normalize_amount(expense['Income amount'], NORMALIZATION_FACTOR)
-        if 'In main currency' in expense:
-            expense['In main currency'] = normalize_amount(expense['In main currency'], NORMALIZATION_FACTOR)
+        return frame
 
-    return expenses
+    return frame.assign(**{col: frame[NORMALIZED_COLUMNS[col]] for col in columns})
 
 class LoginRequest(BaseModel):
     token: str
@@ -210,7 +380,7 @@ def login(request: Request, login_request: LoginRequest, response: Response):
     """Login endpoint that sets httpOnly cookie"""
     token = login_request.token.strip()
 
-    if token in TRUSTED_TOKENS:
+    if is_trusted_token(token):
         # Set secure httpOnly cookie
         is_production = os.getenv("ENVIRONMENT", "development") == "production"
         response.set_cookie(
@@ -266,43 +436,25 @@ def get_expenses(
 ):
     """Get filtered expenses"""
     data = load_data(db)
-    filtered_df = data.copy()
+    filtered_df = _date_range_slice(data, start_date, end_date)
+
+    # Accumulate the filters into one mask and copy out only the requested page
+    mask = np.ones(len(filtered_df), dtype=bool)
 
     if category:
-        filtered_df = filtered_df[filtered_df['Category'].str.contains(category, case=False, na=False)]
+        mask &= _contains(filtered_df['Category'], category, filtered_df['_category_lower']).to_numpy()
 
     if tag:
-        filtered_df = filtered_df[filtered_df['Tags'].str.contains(tag, case=False, na=False)]
+        mask &= _contains(filtered_df['Tags'], tag, filtered_df['_tags_lower']).to_numpy()
 
     if search:
-        mask = (
-            filtered_df['Category'].str.contains(search, case=False, na=False) |
-            filtered_df['Tags'].str.contains(search, case=False, na=False) |
-            filtered_df['Description'].str.contains(search, case=False, na=False)
-        )
-        filtered_df = filtered_df[mask]
-
-    if start_date:
-        filtered_df = filtered_df[filtered_df['Date'] >= pd.to_datetime(start_date)]
-
-    if end_date:
-        filtered_df = filtered_df[filtered_df['Date'] <= pd.to_datetime(end_date)]
-
-    total = len(filtered_df)
-    filtered_df = filtered_df.iloc[offset:offset + limit]
-
-    records = filtered_df.to_dict('records')
-    for record in records:
-        if pd.isna(record['Date']):
-            record['Date'] = None
-        else:
-            record['Date'] = record['Date'].isoformat()
+        mask &= filtered_df['_search_blob'].str.contains(search.lower(), regex=False, na=False).to_numpy()
 
-        for key in record:
-            if pd.isna(record[key]):
-                record[key] = None
+    total = int(mask.sum())
+    filtered_df = filtered_df.iloc[np.flatnonzero(mask)[offset:offset + limit]]
+    filtered_df = normalize_expenses_frame(filtered_df, is_trusted)
 
-    records = normalize_expenses_list(records, is_trusted)
+    records = _to_records(filtered_df)
 
     return {
         "total": total,
@@ -323,32 +475,17 @@ def get_income(
 ):
     """Get income entries"""
     data = load_data(db)
-    income_df = data[data['Income amount'] > 0].copy()
+    income_df = _date_range_slice(data, start_date, end_date)
+    mask = income_df['Income amount'].to_numpy() > 0
 
-    if start_date:
-        income_df = income_df[income_df['Date'] >= pd.to_datetime(start_date)]
-
-    if end_date:
-        income_df = income_df[income_df['Date'] <= pd.to_datetime(end_date)]
-
-    total = len(income_df)
-    income_df = income_df.iloc[offset:offset + limit]
-
-    records = income_df.to_dict('records')
-    for record in records:
-        if pd.isna(record['Date']):
-            record['Date'] = None
-        else:
-            record['Date'] = record['Date'].isoformat()
-
-        for key in record:
-            if pd.isna(record[key]):
-                record[key] = None
+    total = int(mask.sum())
+    income_df = income_df.iloc[np.flatnonzero(mask)[offset:offset + limit]]
 
     # Apply anonymization and normalization for guest users
     if not is_trusted:
-        normalization_factor = get_normalization_factor(df)
-        records = [anonymize_income_entry(record, normalization_factor) for record in records]
+        income_df = anonymize_income_labels(normalize_expenses_frame(income_df, is_trusted, INCOME_AMOUNT_COLUMNS))
+
+    records = _to_records(income_df)
 
     return {
         "total": total,
@@ -358,17 +495,77 @@ def get_income(
         "is_normalized": not is_trusted
     }
 
-def _calculate_summary(data, is_trusted: bool = True):
-    """Internal function to calculate summary from dataframe"""
-    # Use 'In main currency' for EUR-converted amounts
-    df_expenses = data[data['Expense amount'] > 0].copy()
-    df_income = data[data['Income amount'] > 0].copy()
+def _load_summary(db, is_trusted: bool) -> dict:
+    """Load data if needed and return the memoized summary"""
+    load_data(db)
+    return _compute_summary(_loaded_version, is_trusted, NORMALIZATION_FACTOR)
 
-    total_expenses = df_expenses['In main currency'].sum()
-    total_income = df_income['In main currency'].sum()
+def _rollup_breakdowns(rollup: pd.DataFrame) -> dict:
+    """
+    Category, monthly and yearly figures from the monthly_rollup table,
+    shaped like the DataFrame-based results in _calculate_summary
+    """
+    by_category = rollup.groupby('category')[['expenses', 'income', 'expense_count', 'income_count']].sum()
+    category_summary = by_category.loc[by_category['expense_count'] > 0, 'expenses'].sort_values(ascending=False).to_dict()
+    income_by_category = by_category.loc[by_category['income_count'] > 0, 'income'].sort_values(ascending=False).to_dict()
+
+    by_month = rollup.groupby(['year', 'month'])[['expenses', 'income', 'expense_count', 'income_count']].sum()
+    by_month = by_month[(by_month['expense_count'] > 0) | (by_month['income_count'] > 0)]
+    monthly_summary = {
+        f"{year:04d}-{month:02d}": {
+            'expenses': float(row.expenses),
+            'income': float(row.income),
+            'net': float(row.income) - float(row.expenses)
+        }
+        for (year, month), row in zip(by_month.index, by_month.itertuples())
+    }
+
+    # Latest year first, as in the DataFrame path
+    by_year = rollup.groupby('year')[['expenses', 'income']].sum().sort_index(ascending=False)
+    yearly_summary = {
+        int(year): {
+            'expenses': float(row.expenses),
+            'income': float(row.income),
+            'net': float(row.income - row.expenses)
+        }
+        for year, row in zip(by_year.index, by_year.itertuples())
+    }
+
+    return {
+        'total_expenses': rollup['expenses'].sum(),
+        'total_income': rollup['income'].sum(),
+        'category_summary': category_summary,
+        'income_by_category': income_by_category,
+        'monthly_summary': monthly_summary,
+        'yearly_summary': yearly_summary,
+    }
+
+def _calculate_summary(data, is_trusted: bool = True, rollup: Optional[pd.DataFrame] = None):
+    """
+    Internal function to calculate summary from dataframe.
+    When the monthly_rollup table is available (PostgreSQL), category,
+    monthly and yearly figures come from it instead of scanning every row.
+    """
+    # Use 'In main currency' for EUR-converted amounts; the masks and amounts
+    # are plain NumPy arrays shared by every figure below
+    amounts = data['In main currency'].to_numpy()
+    expense_mask = data['Expense amount'].to_numpy() > 0
+    income_mask = data['Income amount'].to_numpy() > 0
+    df_expenses = data[expense_mask]
+
+    if rollup is not None:
+        rolled = _rollup_breakdowns(rollup)
+        total_expenses = rolled['total_expenses']
+        total_income = rolled['total_income']
+        category_summary = rolled['category_summary']
+        income_by_category_raw = rolled['income_by_category']
+    else:
+        total_expenses = np.nansum(amounts[expense_mask])
+        total_income = np.nansum(amounts[income_mask])
 
-    category_summary = df_expenses.groupby('Category')['In main currency'].sum().sort_values(ascending=False).to_dict()
-    income_by_category_raw = df_income.groupby('Category')['In main currency'].sum().sort_values(ascending=False).to_dict()
+        df_income = data[income_mask]
+        category_summary = df_expenses.groupby('Category', observed=True)['In main currency'].sum().sort_values(ascending=False).to_dict()
+        income_by_category_raw = df_income.groupby('Category', observed=True)['In main currency'].sum().sort_values(ascending=False).to_dict()
 
     # Anonymize income categories for guests
     if not is_trusted:
@@ -380,43 +577,44 @@ def _calculate_summary(data, is_trusted: bool = True):
     else:
         income_by_category = income_by_category_raw
 
-    df_with_month = data.copy()
-    df_with_month['Month'] = df_with_month['Date'].dt.to_period('M').astype(str)
-    monthly_expenses = df_with_month[df_with_month['Expense amount'] > 0].groupby('Month')['In main currency'].sum().to_dict()
-    monthly_income = df_with_month[df_with_month['Income amount'] > 0].groupby('Month')['In main currency'].sum().to_dict()
-
-    all_months = set(monthly_expenses.keys()) | set(monthly_income.keys())
-    monthly_summary = {
-        month: {
-            'expenses': float(monthly_expenses.get(month, 0)),
-            'income': float(monthly_income.get(month, 0)),
-            'net': float(monthly_income.get(month, 0)) - float(monthly_expenses.get(month, 0))
+    if rollup is not None:
+        monthly_summary = rolled['monthly_summary']
+    else:
+        # Expense and income amounts side by side, so each period needs one groupby
+        by_kind = pd.DataFrame({
+            'expenses': np.where(expense_mask, amounts, 0),
+            'income': np.where(income_mask, amounts, 0),
+        }, index=data.index)
+        has_amount = expense_mask | income_mask
+        months = data.loc[has_amount, 'Date'].dt.to_period('M').astype(str)
+        monthly = by_kind[has_amount].groupby(months).sum()
+        monthly_summary = {
+            row.Index: {
+                'expenses': float(row.expenses),
+                'income': float(row.income),
+                'net': float(row.income) - float(row.expenses)
+            }
+            for row in monthly.itertuples()
         }
-        for month in sorted(all_months)
-    }
 
-    tag_summary = {}
-    for _, row in df_expenses.iterrows():
-        if pd.notna(row['Tags']):
-            tags = str(row['Tags']).split(',')
-            for tag in tags:
-                tag = tag.strip()
-                if tag:
-                    tag_summary[tag] = tag_summary.get(tag, 0) + row['In main currency']
-
-    tag_summary = dict(sorted(tag_summary.items(), key=lambda x: x[1], reverse=True)[:20])
-
-    df_with_year = data.copy()
-    df_with_year['Year'] = df_with_year['Date'].dt.year
-    yearly_summary = {}
-    for year in df_with_year['Year'].dropna().unique():
-        year_data = df_with_year[df_with_year['Year'] == year]
-        year_expenses = year_data[year_data['Expense amount'] > 0]['In main currency'].sum()
-        year_income = year_data[year_data['Income amount'] > 0]['In main currency'].sum()
-        yearly_summary[int(year)] = {
-            'expenses': float(year_expenses),
-            'income': float(year_income),
-            'net': float(year_income - year_expenses)
+    # Per-tag totals as the product of the expense amounts with the sparse tag
+    # indicator matrix: one weighted bincount over its (row, tag) pairs
+    tag_rows, tag_cols, tag_names = _tag_matrix(df_expenses['Tags'])
+    tag_totals = np.bincount(tag_cols, weights=np.nan_to_num(amounts[expense_mask])[tag_rows], minlength=len(tag_names))
+    tag_summary = pd.Series(tag_totals, index=tag_names, dtype=float).nlargest(20).to_dict()
+
+    if rollup is not None:
+        yearly_summary = rolled['yearly_summary']
+    else:
+        # Latest year first
+        yearly = by_kind.groupby(data['Date'].dt.year).sum().sort_index(ascending=False)
+        yearly_summary = {
+            int(row.Index): {
+                'expenses': float(row.expenses),
+                'income': float(row.income),
+                'net': float(row.income - row.expenses)
+            }
+            for row in yearly.itertuples()
         }
 
     result = {
@@ -433,18 +631,37 @@ def _calculate_summary(data, is_trusted: bool = True):
             "start": data['Date'].min().isoformat() if pd.notna(data['Date'].min()) else None,
             "end": data['Date'].max().isoformat() if pd.notna(data['Date'].max()) else None
         },
-        "income_count": len(data[data['Income amount'] > 0]),
-        "expense_count": len(data[data['Expense amount'] > 0]),
+        "income_count": int(income_mask.sum()),
+        "expense_count": int(expense_mask.sum()),
         "is_normalized": not is_trusted
     }
 
     return apply_data_normalization(result, is_trusted)
 
+# Database versions are shared by all workers; a CSV load is per process, so
+# its ETags also carry a per-run token (the CSV may change between runs)
+_CACHE_EPOCH = "db" if USE_DATABASE else os.urandom(4).hex()
+
+def _summary_etag(is_trusted: bool, version: int) -> str:
+    """
+    Weak ETag for /api/summary: data version and trust level, plus the day for
+    guests (their normalization factor changes daily)
+    """
+    scope = "trusted" if is_trusted else f"guest-{date.today():%Y%m%d}"
+    return f'W/"{_CACHE_EPOCH}-{version}-{scope}"'
+
 @app.get("/api/summary")
-def get_summary(is_trusted: bool = Depends(verify_token), db=Depends(get_db)):
-    """Get overall spending and income summary"""
-    data = load_data(db)
-    return _calculate_summary(data, is_trusted)
+def get_summary(request: Request, response: Response, is_trusted: bool = Depends(verify_token), db=Depends(get_db)):
+    """Get overall spending and income summary (supports If-None-Match)"""
+    etag = _summary_etag(is_trusted, current_data_version(db))
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=60", "Vary": "Authorization, Cookie"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return _load_summary(db, is_trusted)
 
 @app.get("/api/categories")
 def get_categories(db=Depends(get_db)):
@@ -456,20 +673,13 @@ def get_categories(db=Depends(get_db)):
 @app.get("/api/tags")
 def get_tags(db=Depends(get_db)):
     """Get all unique tags"""
-    data = load_data(db)
-    all_tags = set()
-    for tags in data['Tags'].dropna():
-        for tag in str(tags).split(','):
-            tag = tag.strip()
-            if tag:
-                all_tags.add(tag)
-    return {"tags": sorted(list(all_tags))}
+    load_data(db)
+    return {"tags": _tag_names(_loaded_version)}
 
 @app.post("/api/insights")
 @limiter.limit("10/minute")  # Max 10 AI requests per minute
 async def get_ai_insights(request: Request, insight_request: AIInsightRequest, is_trusted: bool = Depends(verify_token), db=Depends(get_db)):
     """Get AI-powered financial insights using Claude - Only for authenticated users"""
-    data = load_data(db)
     if not is_trusted:
         raise HTTPException(
             status_code=403,
@@ -480,9 +690,8 @@ async def get_ai_insights(request: Request, insight_request: AIInsightRequest, i
     if not api_key:
         raise HTTPException(status_code=500, detail="ANTHROPIC_API_KEY not configured")
 
-    # Always use real data for AI analysis
-    data = load_data(db)
-    summary_data = _calculate_summary(data, is_trusted=True)
+    # Always use real data for AI analysis; the (possibly cold) load runs off the event loop
+    summary_data = await asyncio.to_thread(_load_summary, db, True)
 
     context = f"""
 You are a financial advisor analyzing expense data. Here's the summary:
@@ -508,8 +717,8 @@ Top Spending Categories:
     user_query = insight_request.query or "Analyze my spending and income patterns and provide advice on how to optimize my finances."
 
     try:
-        client = anthropic.Anthropic(api_key=api_key)
-        message = client.messages.create(
+        client = anthropic.AsyncAnthropic(api_key=api_key)
+        message = await client.messages.create(
             model="claude-sonnet-4-5-20250929",  # Claude Sonnet 4.5 (September 2024)
             max_tokens=2048,
             messages=[
@@ -529,35 +738,45 @@ Top Spending Categories:
 
 @app.get("/api/search")
 def search_expenses(q: str, limit: int = 50, is_trusted: bool = Depends(verify_token), db=Depends(get_db)):
-    """Search expenses by keyword"""
-    data = load_data(db)
-    search_term = q.lower()
-
-    mask = (
-        data['Category'].astype(str).str.lower().str.contains(search_term, na=False) |
-        data['Tags'].astype(str).str.lower().str.contains(search_term, na=False) |
-        data['Description'].astype(str).str.lower().str.contains(search_term, na=False)
-    )
-
-    results = data[mask].head(limit)
-    # Use EUR-converted amounts for totals
-    matched_df = data[mask]
-    total_amount = matched_df[matched_df['Expense amount'] > 0]['In main currency'].sum()
-    total_income = matched_df[matched_df['Income amount'] > 0]['In main currency'].sum()
-    count = len(matched_df)
-
-    records = results.to_dict('records')
-    for record in records:
-        if pd.isna(record['Date']):
-            record['Date'] = None
-        else:
-            record['Date'] = record['Date'].isoformat()
-
-        for key in record:
-            if pd.isna(record[key]):
-                record[key] = None
-
-    records = normalize_expenses_list(records, is_trusted)
+    """
+    Search expenses by keyword.
+    With a database, matching is word-based: every word of q must start a
+    word of the category, tags or description ('cof' finds 'coffee', 'offee'
+    does not). The CSV fallback matches q as a substring anywhere.
+    """
+    if USE_DATABASE and db is not None:
+        # Full-text search in PostgreSQL; only the returned page is fetched
+        refresh_normalization_factor()
+        rows = search_transactions(db, q, limit=limit)
+        results = pd.DataFrame.from_records([t.to_tuple() for t in rows], columns=COLUMNS)
+        results['Date'] = pd.to_datetime(results['Date'])
+        if not is_trusted:
+            # Rows fetched for this request only, so no precomputed columns yet
+            results = _with_normalized_columns(results, NORMALIZATION_FACTOR)
+
+        # Use EUR-converted amounts for totals
+        totals = get_search_totals(db, q)
+        total_amount = totals['total_expenses']
+        total_income = totals['total_income']
+        count = totals['count']
+    else:
+        data = load_data(db)
+        search_term = q.lower()
+
+        mask = data['_search_blob'].str.contains(search_term, regex=False, na=False).to_numpy()
+        match_idx = np.flatnonzero(mask)
+
+        # Only the returned page is copied out of the frame
+        results = data.iloc[match_idx[:limit]]
+
+        # Use EUR-converted amounts for totals, straight from the column arrays
+        amounts = data['In main currency'].to_numpy()
+        total_amount = np.nansum(amounts[mask & (data['Expense amount'].to_numpy() > 0)])
+        total_income = np.nansum(amounts[mask & (data['Income amount'].to_numpy() > 0)])
+        count = int(match_idx.size)
+
+    results = normalize_expenses_frame(results, is_trusted)
+    records = _to_records(results)
 
     if not is_trusted:
         total_amount = normalize_amount(total_amount, NORMALIZATION_FACTOR)
@@ -582,9 +801,9 @@ async def reset_database(is_trusted: bool = Depends(verify_token)):
         raise HTTPException(status_code=400, detail="Not using PostgreSQL database")
 
     try:
-        from backend.database import Base, engine
+        from backend.database import Base, engine, create_rollup_triggers, seed_data_version
     except ImportError:
-        from database import Base, engine
+        from database import Base, engine, create_rollup_triggers, seed_data_version
 
     if engine is None:
         raise HTTPException(status_code=500, detail="Database engine not initialized")
@@ -594,6 +813,9 @@ async def reset_database(is_trusted: bool = Depends(verify_token)):
 
     # Recreate all tables
     Base.metadata.create_all(bind=engine)
+    create_rollup_triggers(engine)
+    # A fresh version row, newer than any before the reset, so workers drop their caches
+    seed_data_version(engine)
 
     return {"status": "success", "message": "Database tables reset successfully"}
 
@@ -613,42 +835,15 @@ async def migrate_csv_data(file: UploadFile = File(...), is_trusted: bool = Depe
         raise HTTPException(status_code=400, detail="DATABASE_URL not configured - cannot migrate to PostgreSQL")
 
     try:
-        # Read CSV content
-        content = await file.read()
-
-        # Save temporarily
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.csv', delete=False) as tmp:
-            tmp.write(content)
-            tmp_path = tmp.name
-
-        # Parse CSV
-        df_migration = pd.read_csv(tmp_path)
-
-        # Clean data
-        df_migration['Date'] = pd.to_datetime(df_migration['Date'], format='%m/%d/%y', errors='coerce')
-        df_migration['Expense amount'] = df_migration['Expense amount'].replace(',', '', regex=True).astype(float)
-        df_migration['Income amount'] = df_migration['Income amount'].replace(',', '', regex=True).astype(float)
-        if 'In main currency' in df_migration.columns:
-            df_migration['In main currency'] = df_migration['In main currency'].replace(',', '', regex=True).astype(float)
-
-        # Fill NaN
-        df_migration = df_migration.fillna({
-            'Account': '',
-            'Category': '',
-            'Tags': '',
-            'Expense amount': 0.0,
-            'Income amount': 0.0,
-            'Currency': 'EUR',
-            'Main currency': 'EUR',
-            'In main currency': 0.0,
-            'Description': ''
-        })
-
         # Import to database
         try:
             from backend.database import SessionLocal, Transaction, ensure_tables_exist
+            from backend.db_operations import has_transactions
+            from backend.ingest import ingest_transactions
         except ImportError:
             from database import SessionLocal, Transaction, ensure_tables_exist
+            from db_operations import has_transactions
+            from ingest import ingest_transactions
 
         # Ensure tables exist before migration
         ensure_tables_exist()
@@ -656,47 +851,24 @@ async def migrate_csv_data(file: UploadFile = File(...), is_trusted: bool = Depe
         db_session = SessionLocal()
 
         try:
-            # Check existing
-            existing = db_session.query(Transaction).count()
-            if existing > 0:
+            # Check existing (only counted when there is something to report)
+            if has_transactions(db_session):
+                existing = db_session.query(Transaction).count()
                 db_session.close()
-                os.unlink(tmp_path)
                 return {
                     "status": "error",
                     "message": f"Database already contains {existing} transactions. Clear manually if needed."
                 }
 
-            # Bulk insert
-            inserted = 0
-            batch_size = 1000
-
-            for i in range(0, len(df_migration), batch_size):
-                batch = df_migration.iloc[i:i+batch_size]
-                transactions = []
-
-                for _, row in batch.iterrows():
-                    transaction = Transaction(
-                        date=row['Date'],
-                        account=str(row['Account']),
-                        category=str(row['Category']),
-                        tags=str(row['Tags']),
-                        expense_amount=float(row['Expense amount']),
-                        income_amount=float(row['Income amount']),
-                        currency=str(row['Currency']),
-                        main_currency=str(row['Main currency']),
-                        in_main_currency=float(row.get('In main currency', 0.0)),
-                        description=str(row.get('Description', ''))
-                    )
-                    transactions.append(transaction)
-
-                db_session.bulk_save_objects(transactions)
-                db_session.commit()
-                inserted += len(transactions)
-
-            final_count = db_session.query(Transaction).count()
-
-            # Clean up temp file
-            os.unlink(tmp_path)
+            # Parse the upload in place (Starlette has already spooled it to a
+            # temp file) and bulk load it chunk by chunk off the event loop;
+            # commit once at the end
+            inserted = await asyncio.to_thread(ingest_transactions, file.file, db_session)
+            db_session.commit()
+
+            # The table was empty, so it now holds exactly the imported rows
+            # (the import bumped the data version, so caches reload)
+            final_count = inserted
 
             return {
                 "status": "success",
@@ -33,8 +33,8 @@ async def migrate_csv_data(file: UploadFile = File(...), is_trusted: bool = Depe
 
         # Clean data
         df['Date'] = pd.to_datetime(df['Date'], format='%m/%d/%y', errors='coerce')
-        df['Expense amount'] = df['Expense amount'].replace(',', '', regex=True).astype(float)
-        df['Income amount'] = df['Income amount'].replace(',', '', regex=True).astype(float)
+        df['Expense amount'] = df['Expense amount'].astype(str).str.replace(',', '', regex=False).astype(float)
+        df['Income amount'] = df['Income amount'].astype(str).str.replace(',', '', regex=False).astype(float)
 
         # Fill NaN
         df = df.fillna({
@@ -49,7 +49,10 @@ async def migrate_csv_data(file: UploadFile = File(...), is_trusted: bool = Depe
         })
 
         # Import to database
-        from backend.database import SessionLocal, Transaction
+        try:
+            from backend.database import SessionLocal, Transaction
+        except ImportError:
+            from database import SessionLocal, Transaction
         db = SessionLocal()
 
         try:
@@ -61,31 +64,16 @@ async def migrate_csv_data(file: UploadFile = File(...), is_trusted: bool = Depe
                     "message": f"Database already contains {existing} transactions. Clear manually if needed."
                 }
 
-            # Bulk insert
-            inserted = 0
-            batch_size = 1000
-
-            for i in range(0, len(df), batch_size):
-                batch = df.iloc[i:i+batch_size]
-                transactions = []
-
-                for _, row in batch.iterrows():
-                    transaction = Transaction(
-                        date=row['Date'],
-                        account=str(row['Account']),
-                        category=str(row['Category']),
-                        tags=str(row['Tags']),
-                        expense_amount=float(row['Expense amount']),
-                        income_amount=float(row['Income amount']),
-                        currency=str(row['Currency']),
-                        main_currency=str(row['Main currency']),
-                        description=str(row.get('Description', ''))
-                    )
-                    transactions.append(transaction)
-
-                db.bulk_save_objects(transactions)
-                db.commit()
-                inserted += len(transactions)
+            # Bulk insert (COPY on PostgreSQL, batched multi-row INSERTs elsewhere)
+            try:
+                from backend.ingest import insert_transactions
+                from backend.db_operations import bump_data_version
+            except ImportError:
+                from ingest import insert_transactions
+                from db_operations import bump_data_version
+            inserted = insert_transactions(db, df)
+            bump_data_version(db)
+            db.commit()
 
             final_count = db.query(Transaction).count()
 
@@ -0,0 +1,46 @@
+"""
+Shared fixtures. Tests run in CSV mode against small in-memory frames,
+without a database or the files in data/.
+"""
+import os
+
+# Set before main/auth are imported: an empty DATABASE_URL selects CSV mode
+# (and keeps a local .env from switching it on), plus one trusted token
+os.environ["DATABASE_URL"] = ""
+os.environ["TRUSTED_TOKENS"] = "test-token"
+
+import pandas as pd
+import pytest
+
+import main
+
+TRUSTED = {"Authorization": "Bearer test-token"}
+
+
+def make_transactions(rows) -> pd.DataFrame:
+    """Raw transactions (CSV column names) from (date, category, tags, expense, income) tuples"""
+    data = pd.DataFrame(rows, columns=["Date", "Category", "Tags", "Expense amount", "Income amount"])
+    data["Date"] = pd.to_datetime(data["Date"], format="ISO8601")
+    data["Account"] = "Bank"
+    data["Currency"] = "EUR"
+    data["Main currency"] = "EUR"
+    data["In main currency"] = data["Expense amount"].where(data["Expense amount"] > 0, data["Income amount"])
+    data["Description"] = ""
+    return data
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    """Install a prepared frame as main's cached data; returns a function taking rows"""
+    def load(rows):
+        monkeypatch.setattr(main, "df", main._prepare_data(make_transactions(rows)))
+        monkeypatch.setattr(main, "rollup", None)
+        monkeypatch.setattr(main, "_loaded_version", 0)
+        monkeypatch.setattr(main, "_normalized_with", None)
+        main._compute_summary.cache_clear()
+        main._tag_names.cache_clear()
+        return main.load_data()
+
+    yield load
+    main._compute_summary.cache_clear()
+    main._tag_names.cache_clear()
@@ -0,0 +1,50 @@
+import zlib
+
+import auth
+
+
+def test_anonymize_income_text_is_deterministic():
+    assert auth.anonymize_income_text("ACME Corp salary") == auth.anonymize_income_text("ACME Corp salary")
+    assert auth.anonymize_income_text("") == ""
+
+
+def test_anonymize_income_text_picks_from_pool_by_length():
+    short, long = "dividends", "Quarterly payout from ACME Holdings"
+    assert auth.anonymize_income_text(short) in auth.INCOME_TAGS
+    assert auth.anonymize_income_text(long) in auth.INCOME_CATEGORIES
+    # The CRC32 of the UTF-8 text plus the seed indexes the pool
+    assert auth.anonymize_income_text(long) == auth.INCOME_CATEGORIES[(zlib.crc32(long.encode()) + 42) % 5]
+    assert auth.anonymize_income_text(short, seed=0) == auth.INCOME_TAGS[zlib.crc32(short.encode()) % 7]
+
+
+def test_anonymize_income_text_spreads_over_the_pool():
+    labels = {auth.anonymize_income_text(f"client {i}") for i in range(200)}
+    assert labels == set(auth.INCOME_TAGS)
+
+
+def test_anonymize_income_tags_dedupes_in_first_seen_order():
+    tags = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta"]
+    labels = [auth.anonymize_income_text(tag) for tag in tags]
+    assert auth.anonymize_income_tags(", ".join(tags)) == ", ".join(dict.fromkeys(labels))
+    # Whitespace around tags does not change their labels
+    assert auth.anonymize_income_tags(" alpha ,alpha,  beta") == ", ".join(dict.fromkeys(labels[:2]))
+
+
+def test_anonymize_income_entry():
+    entry = {"Date": "2024-01-02", "Category": "Salary", "Tags": "acme, bonus", "Income amount": 1000.0,
+             "In main currency": "1,000", "Description": "January"}
+    anonymized = auth.anonymize_income_entry(entry, normalization_factor=0.25)
+    assert anonymized == {
+        "Date": "2024-01-02",
+        "Category": auth.anonymize_income_text("Salary"),
+        "Tags": auth.anonymize_income_tags("acme, bonus"),
+        "Income amount": 250.0,
+        "In main currency": 250.0,
+        "Description": "Income payment",
+    }
+    assert entry["Category"] == "Salary"
+
+
+def test_anonymize_income_entry_leaves_empty_and_absent_fields():
+    entry = {"Category": "", "Tags": None, "Income amount": 0}
+    assert auth.anonymize_income_entry(entry, normalization_factor=0.25) == entry
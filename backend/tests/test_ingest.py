@@ -0,0 +1,87 @@
+import io
+import struct
+
+import pandas as pd
+import pytest
+
+import ingest
+
+HEADER = "Date,Account,Category,Tags,Expense amount,Income amount,Currency,Main currency,In main currency,Description\n"
+
+
+def parse(body: str) -> pd.DataFrame:
+    """Parse and clean CSV rows exactly as ingest_transactions does"""
+    chunk = next(pd.read_csv(io.StringIO(HEADER + body), chunksize=ingest.CHUNK_ROWS, **ingest.CSV_OPTIONS))
+    return ingest.clean_chunk(chunk)
+
+
+def test_clean_chunk_parses_dates():
+    frame = parse("01/02/21,Bank,Food,,10,,EUR,EUR,10,Lunch\n12/31/23,Bank,Food,,5,,EUR,EUR,5,\n")
+    assert pd.api.types.is_datetime64_any_dtype(frame["Date"])
+    assert frame["Date"].tolist() == [pd.Timestamp("2021-01-02"), pd.Timestamp("2023-12-31")]
+
+
+def test_clean_chunk_coerces_unparseable_dates_to_nat():
+    frame = parse("01/02/21,Bank,Food,,10,,EUR,EUR,10,\nnot a date,Bank,Food,,5,,EUR,EUR,5,\n,Bank,Food,,1,,EUR,EUR,1,\n")
+    assert pd.api.types.is_datetime64_any_dtype(frame["Date"])
+    assert frame["Date"].iloc[0] == pd.Timestamp("2021-01-02")
+    assert frame["Date"].iloc[1:].isna().all()
+
+
+def test_clean_chunk_fills_missing_amounts_and_currencies():
+    frame = parse("01/02/21,,,,,,,,,\n")
+    row = frame.iloc[0]
+    assert row["Expense amount"] == 0.0 and row["Income amount"] == 0.0 and row["In main currency"] == 0.0
+    assert row["Currency"] == "EUR" and row["Main currency"] == "EUR"
+    # Other text columns keep empty fields as '' rather than missing
+    assert row["Account"] == "" and row["Category"] == "" and row["Tags"] == "" and row["Description"] == ""
+    assert not frame.isna().any().any()
+
+
+def test_clean_chunk_keeps_na_like_text():
+    frame = parse("01/02/21,NA,null,N/A,\"1,234.5\",,NA,EUR,\"1,234.5\",None\n")
+    row = frame.iloc[0]
+    assert (row["Account"], row["Category"], row["Tags"], row["Currency"], row["Description"]) == ("NA", "null", "N/A", "NA", "None")
+    assert row["Expense amount"] == 1234.5 and row["Income amount"] == 0.0
+
+
+def decode_binary_copy(payload: bytes) -> list:
+    """Rows of a binary COPY payload, fixed columns as Python values and text as str"""
+    assert payload.startswith(ingest.BINARY_COPY_HEADER) and payload.endswith(ingest.BINARY_COPY_TRAILER)
+    data, pos, rows = payload[:-2], len(ingest.BINARY_COPY_HEADER), []
+    while pos < len(data):
+        (count,) = struct.unpack_from(">h", data, pos)
+        pos += 2
+        fields = []
+        for _ in range(count):
+            (length,) = struct.unpack_from(">i", data, pos)
+            fields.append(data[pos + 4:pos + 4 + length])
+            pos += 4 + length
+        date = ingest.PG_EPOCH + struct.unpack(">q", fields[0])[0]
+        amounts = [struct.unpack(">d", field)[0] for field in fields[1:4]]
+        rows.append((pd.Timestamp(date), *amounts, *(field.decode("utf-8") for field in fields[4:])))
+    return rows
+
+
+def test_binary_copy_payload_round_trip():
+    frame = parse(
+        "01/02/21,Bank,Café,\"a, b\",\"1,234.5\",,USD,EUR,1100.25,Crème brûlée ☕\n"
+        "12/31/23,Bank,Salary,,,0.1,,,0.1,\n"
+    )
+    frame.loc[1, "Date"] = pd.Timestamp("2023-12-31 08:30:00.000123")
+    rows = decode_binary_copy(ingest._binary_copy_payload(ingest._transaction_frame(frame)))
+    assert rows == [
+        (pd.Timestamp("2021-01-02"), 1234.5, 0.0, 1100.25, "Bank", "Café", "a, b", "USD", "EUR", "Crème brûlée ☕"),
+        (pd.Timestamp("2023-12-31 08:30:00.000123"), 0.0, 0.1, 0.1, "Bank", "Salary", "", "EUR", "EUR", ""),
+    ]
+
+
+def test_binary_copy_payload_empty_frame():
+    records = ingest._transaction_frame(parse("01/02/21,Bank,Food,,1,,EUR,EUR,1,\n").iloc[:0])
+    assert ingest._binary_copy_payload(records) == ingest.BINARY_COPY_HEADER + ingest.BINARY_COPY_TRAILER
+
+
+def test_binary_copy_payload_rejects_missing_dates():
+    records = ingest._transaction_frame(parse("01/02/21,Bank,Food,,1,,EUR,EUR,1,\nbad,Bank,Food,,1,,EUR,EUR,1,\n"))
+    with pytest.raises(ValueError, match="valid date"):
+        ingest._binary_copy_payload(records)
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+from conftest import make_transactions, TRUSTED
+
+DATES = ["2024-01-03", None, "2024-01-01", "2024-01-05 12:00", "2024-01-02", "2024-01-04", None, "2024-01-05"]
+
+
+@pytest.fixture
+def frame():
+    rows = [(d, "Food", "", 1.0, 0.0) for d in DATES]
+    return main._prepare_data(make_transactions(rows))
+
+
+def expected_slice(frame, start_date, end_date):
+    """The plain comparison filter that _date_range_slice replaces"""
+    mask = pd.Series(True, index=frame.index)
+    if start_date:
+        mask &= frame["Date"] >= pd.to_datetime(start_date)
+    if end_date:
+        mask &= frame["Date"] <= pd.to_datetime(end_date)
+    return frame[mask]
+
+
+def test_prepare_data_sorts_dates_descending_with_nat_last(frame):
+    dates = frame["Date"]
+    assert dates.iloc[-2:].isna().all()
+    assert dates.iloc[:-2].is_monotonic_decreasing
+
+
+def test_date_range_slice_without_bounds_returns_the_frame(frame):
+    assert main._date_range_slice(frame, None, None) is frame
+
+
+@pytest.mark.parametrize("start_date, end_date", [
+    ("2024-01-02", "2024-01-04"),
+    ("2024-01-02", None),
+    (None, "2024-01-03"),
+    ("2024-01-05", "2024-01-05"),
+    ("2024-01-05", "2024-01-05 12:00"),
+    ("2023-12-01", "2023-12-31"),
+    ("2025-01-01", None),
+    (None, "2023-12-31"),
+])
+def test_date_range_slice_matches_comparison_filter(frame, start_date, end_date):
+    sliced = main._date_range_slice(frame, start_date, end_date)
+    pd.testing.assert_frame_equal(sliced, expected_slice(frame, start_date, end_date))
+
+
+def test_date_range_slice_excludes_rows_without_date(frame):
+    assert main._date_range_slice(frame, "2000-01-01", None)["Date"].notna().all()
+    assert main._date_range_slice(frame, None, "2100-01-01")["Date"].notna().all()
+
+
+def test_date_range_slice_random_frames():
+    rng = np.random.default_rng(0)
+    hours = rng.integers(0, 60 * 24, 500)
+    dates = [None if h % 13 == 0 else pd.Timestamp("2024-01-01") + pd.Timedelta(hours=int(h)) for h in hours]
+    frame = main._prepare_data(make_transactions([(d, "Food", "", 1.0, 0.0) for d in dates]))
+    for start_date, end_date in [("2024-01-10", "2024-02-01 06:00"), ("2024-02-15", None), (None, "2024-01-20")]:
+        sliced = main._date_range_slice(frame, start_date, end_date)
+        pd.testing.assert_frame_equal(sliced, expected_slice(frame, start_date, end_date))
+
+
+def test_to_records_json_ready_values():
+    data = make_transactions([("2024-01-02 13:45:10", "Food", "a, b", 12.5, 0.0), (None, None, None, np.nan, 3.0)])
+    records = main._to_records(main._prepare_data(data))
+
+    assert records[0]["Date"] == "2024-01-02T13:45:10"
+    assert records[0]["Category"] == "Food"
+    assert records[0]["Expense amount"] == 12.5 and type(records[0]["Expense amount"]) is float
+    # NaN and NaT (also in categorical columns) become None
+    assert records[1]["Date"] is None
+    assert records[1]["Category"] is None
+    assert records[1]["Tags"] is None
+    assert records[1]["Expense amount"] is None
+    assert records[1]["Income amount"] == 3.0
+
+
+def test_to_records_drops_internal_columns():
+    frame = main._prepare_data(make_transactions([("2024-01-02", "Food", "", 1.0, 0.0)]))
+    frame = main._with_normalized_columns(frame, 0.5)
+    assert any(col.startswith("_") for col in frame.columns)
+
+    records = main._to_records(frame)
+    assert set(records[0]) == set(main.COLUMNS)
+
+
+def test_to_records_empty_frame():
+    frame = main._prepare_data(make_transactions([("2024-01-02", "Food", "", 1.0, 0.0)]))
+    assert main._to_records(frame.iloc[:0]) == []
+
+
+SUMMARY_ROWS = [
+    ("2024-01-02", "Food", "coffee", 12.5, 0.0),
+    ("2024-02-03", "Salary", "", 0.0, 1000.0),
+    ("2024-02-10", "Food", "coffee, lunch", 7.5, 0.0),
+]
+
+
+@pytest.fixture
+def client(loaded):
+    from fastapi.testclient import TestClient
+    loaded(SUMMARY_ROWS)
+    return TestClient(main.app)
+
+
+def test_summary_sends_etag_and_cache_headers(client):
+    response = client.get("/api/summary")
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('W/"')
+    assert response.headers["cache-control"] == "private, max-age=60"
+    assert response.headers["vary"] == "Authorization, Cookie"
+    assert response.json()["expense_count"] == 2
+
+
+@pytest.mark.parametrize("if_none_match", ["{etag}", "*", 'W/"other", {etag}'])
+def test_summary_matching_etag_returns_304(client, if_none_match):
+    etag = client.get("/api/summary").headers["etag"]
+    response = client.get("/api/summary", headers={"If-None-Match": if_none_match.format(etag=etag)})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_summary_stale_etag_returns_200(client):
+    response = client.get("/api/summary", headers={"If-None-Match": 'W/"stale"'})
+    assert response.status_code == 200
+
+
+def test_summary_etag_depends_on_trust_and_day(client):
+    guest = client.get("/api/summary").headers["etag"]
+    trusted = client.get("/api/summary", headers=TRUSTED).headers["etag"]
+    assert guest != trusted
+    # Guest figures are scaled by a daily factor, so their tag names the day
+    assert f"guest-{main.date.today():%Y%m%d}" in guest
+
+
+def test_summary_etag_changes_with_data_version(client, monkeypatch):
+    etag = client.get("/api/summary").headers["etag"]
+
+    monkeypatch.setattr(main, "current_data_version", lambda db=None: 1)
+    response = client.get("/api/summary", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -9,17 +9,37 @@ Usage:
 
 import sys
 import os
-import pandas as pd
+import time
 from pathlib import Path
 
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from backend.database import init_db, SessionLocal, Transaction
+from sqlalchemy import text
+from backend.database import init_db, ensure_tables_exist, SessionLocal, Transaction
+from backend.db_operations import has_transactions
+from backend.ingest import ingest_transactions, CHUNK_ROWS
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Minimum seconds between progress lines; each print is a blocking stdout write
+PROGRESS_INTERVAL = 5.0
+
+
+def print_progress_every(interval: float):
+    """Progress callback that prints the running count at most once per interval"""
+    last_printed = time.monotonic()
+
+    def on_progress(count: int):
+        nonlocal last_printed
+        now = time.monotonic()
+        if now - last_printed >= interval:
+            print(f"   Progress: {count} transactions imported")
+            last_printed = now
+
+    return on_progress
+
 
 def migrate_csv_to_database(csv_file_path: str):
     """Migrate CSV data to PostgreSQL database"""
@@ -39,76 +59,54 @@ def migrate_csv_to_database(csv_file_path: str):
         sys.exit(1)
 
     engine = init_db()
+    ensure_tables_exist()
     print(f"✅ Connected to database")
 
-    # Load CSV
-    print(f"📖 Reading CSV file...")
-    df = pd.read_csv(csv_file_path)
-    print(f"   Found {len(df)} transactions")
-
-    # Data cleaning
-    print("🧹 Cleaning data...")
-    df['Date'] = pd.to_datetime(df['Date'], format='%m/%d/%y', errors='coerce')
-    df['Expense amount'] = df['Expense amount'].replace(',', '', regex=True).astype(float)
-    df['Income amount'] = df['Income amount'].replace(',', '', regex=True).astype(float)
-
-    # Fill NaN values
-    df = df.fillna({
-        'Account': '',
-        'Category': '',
-        'Tags': '',
-        'Expense amount': 0.0,
-        'Income amount': 0.0,
-        'Currency': 'EUR',
-        'Main currency': 'EUR',
-        'Description': ''
-    })
-
     # Create database session
     db = SessionLocal()
 
     try:
-        # Check if data already exists
-        existing_count = db.query(Transaction).count()
-        if existing_count > 0:
+        # Clearing and importing run in one transaction, committed once at the end
+
+        # Check if data already exists (cheap LIMIT 1; only counted when it does)
+        first_load = not has_transactions(db)
+        if not first_load:
+            existing_count = db.query(Transaction).count()
             print(f"⚠️  Warning: Database already contains {existing_count} transactions")
             response = input("   Do you want to clear existing data and reimport? (yes/no): ")
             if response.lower() == 'yes':
                 print("🗑️  Deleting existing transactions...")
-                db.query(Transaction).delete()
-                db.commit()
+                if db.get_bind().dialect.name == "postgresql":
+                    # Frees the pages at once (no per-row WAL, no dead tuples) and resets the id sequence
+                    db.execute(text(f"TRUNCATE TABLE {Transaction.__tablename__} RESTART IDENTITY"))
+                else:
+                    db.query(Transaction).delete()
                 print(f"   Deleted {existing_count} transactions")
             else:
                 print("❌ Migration cancelled")
                 return
 
-        # Insert transactions
-        print(f"💾 Importing {len(df)} transactions...")
-        inserted = 0
-        batch_size = 1000
-
-        for i in range(0, len(df), batch_size):
-            batch = df.iloc[i:i+batch_size]
-            transactions = []
-
-            for _, row in batch.iterrows():
-                transaction = Transaction(
-                    date=row['Date'],
-                    account=str(row['Account']),
-                    category=str(row['Category']),
-                    tags=str(row['Tags']),
-                    expense_amount=float(row['Expense amount']),
-                    income_amount=float(row['Income amount']),
-                    currency=str(row['Currency']),
-                    main_currency=str(row['Main currency']),
-                    description=str(row.get('Description', ''))
-                )
-                transactions.append(transaction)
-
-            db.bulk_save_objects(transactions)
-            db.commit()
-            inserted += len(transactions)
-            print(f"   Progress: {inserted}/{len(df)} transactions imported")
+        # On the first load into an empty PostgreSQL table, drop the secondary
+        # indexes and build them once afterwards; DDL is transactional, so a
+        # failed import restores them. Dropping locks the table until commit,
+        # so a reimport (with the app reading the old rows) keeps its indexes.
+        rebuild_indexes = first_load and db.get_bind().dialect.name == "postgresql"
+        indexes = list(Transaction.__table__.indexes)
+        if rebuild_indexes:
+            print(f"🗂️  Dropping {len(indexes)} indexes for the bulk load...")
+            for index in indexes:
+                index.drop(bind=db.connection(), checkfirst=True)
+
+        # Read, clean and insert the CSV chunk by chunk (COPY on PostgreSQL)
+        print(f"📖 Importing CSV in chunks of {CHUNK_ROWS} rows...")
+        inserted = ingest_transactions(csv_file_path, db, on_progress=print_progress_every(PROGRESS_INTERVAL))
+
+        if rebuild_indexes:
+            print("🗂️  Rebuilding indexes and refreshing planner statistics...")
+            for index in indexes:
+                index.create(bind=db.connection())
+            db.execute(text(f"ANALYZE {Transaction.__tablename__}"))
+        db.commit()
 
         print(f"✅ Successfully imported {inserted} transactions!")
 